@@ -0,0 +1,157 @@
+#!/usr/bin/env python
+# coding: utf-8
+
+# Copyright (c) Microsoft Corporation.
+# Licensed under the MIT license.
+
+"""
+Benchmarks of the DataFrames conversion into dataset create configurations, run with asv (https://asv.readthedocs.io/)
+
+Each benchmark reports the conversion time (time_*), the peak memory of the process (peakmem_*)
+and the JSON size in bytes of the converted rows (track_payload_bytes), for a sweep of rows x columns x dtype mixes
+"""
+
+import json
+import numpy as np
+import pandas as pd
+
+from powerbiclient.utils import get_dataset_config, pandas_get_data_and_schema, pyspark_get_data_and_schema
+
+ROWS = [10000, 100000]
+COLUMNS = [4, 32]
+DTYPE_MIXES = ['numeric', 'text', 'datetime', 'tz_datetime', 'bool', 'na_heavy', 'mixed']
+
+# Columns of each dtype mix, repeated up to the number of columns of the DataFrame
+DTYPE_MIX_COLUMNS = {
+    'numeric': ['int', 'float'],
+    'text': ['category_text', 'id_text'],
+    'datetime': ['datetime'],
+    'tz_datetime': ['tz_datetime'],
+    'bool': ['bool'],
+    'na_heavy': ['na_float', 'na_text'],
+    'mixed': ['int', 'float', 'category_text', 'id_text', 'datetime', 'tz_datetime', 'bool', 'na_float', 'na_text']
+}
+
+SPARK_SESSION = None
+
+
+def make_column(kind, rows, rng):
+    if kind == 'int':
+        return rng.integers(-10 ** 6, 10 ** 6, rows)
+    elif kind == 'float':
+        return rng.normal(1000, 250, rows)
+    elif kind == 'category_text':
+        return rng.choice(['North America', 'South America', 'Europe', 'Asia Pacific', 'Africa'], rows)
+    elif kind == 'id_text':
+        return [f'ID-{value:012d}' for value in rng.permutation(rows)]
+    elif kind == 'datetime':
+        return pd.Timestamp('2020-01-01') + pd.to_timedelta(rng.integers(0, 10 ** 8, rows), unit='s')
+    elif kind == 'tz_datetime':
+        return (pd.Timestamp('2020-01-01') + pd.to_timedelta(rng.integers(0, 10 ** 8, rows), unit='s')).tz_localize('UTC').tz_convert('Europe/Paris')
+    elif kind == 'bool':
+        return rng.random(rows) < 0.5
+    elif kind == 'na_float':
+        return np.where(rng.random(rows) < 0.5, np.nan, rng.normal(1000, 250, rows))
+    elif kind == 'na_text':
+        return np.where(rng.random(rows) < 0.5, None, rng.choice(['low', 'medium', 'high'], rows))
+
+    raise ValueError(f"Unknown column kind '{kind}'")
+
+
+def make_dataframe(rows, columns, dtype_mix, seed=0):
+    # The same parameters always generate the same DataFrame, so results are comparable across commits
+    rng = np.random.default_rng(seed)
+    kinds = DTYPE_MIX_COLUMNS[dtype_mix]
+
+    return pd.DataFrame({f'{kinds[position % len(kinds)]}_{position}': make_column(kinds[position % len(kinds)], rows, rng)
+                         for position in range(columns)})
+
+
+def get_spark_session():
+    global SPARK_SESSION
+
+    if SPARK_SESSION is None:
+        try:
+            from pyspark.sql import SparkSession
+
+            SPARK_SESSION = (SparkSession.builder
+                             .master('local[2]')
+                             .appName('powerbiclient-benchmarks')
+                             .config('spark.ui.enabled', 'false')
+                             .config('spark.sql.shuffle.partitions', '2')
+                             .config('spark.sql.execution.arrow.pyspark.enabled', 'true')
+                             .getOrCreate())
+        except Exception as ex:
+            # asv skips benchmarks whose setup raises NotImplementedError, e.g. when Java is not installed
+            raise NotImplementedError(f"Spark is not available: {ex}")
+
+    return SPARK_SESSION
+
+
+def get_payload_bytes(rows):
+    return len(json.dumps(rows, ensure_ascii=False).encode('utf-8'))
+
+
+class GetDatasetConfig:
+    params = (ROWS, COLUMNS, DTYPE_MIXES)
+    param_names = ['rows', 'columns', 'dtype_mix']
+    timeout = 300
+
+    def setup(self, rows, columns, dtype_mix):
+        self.df = make_dataframe(rows, columns, dtype_mix)
+
+    def time_get_dataset_config(self, rows, columns, dtype_mix):
+        get_dataset_config(self.df)
+
+    def peakmem_get_dataset_config(self, rows, columns, dtype_mix):
+        get_dataset_config(self.df)
+
+    def track_payload_bytes(self, rows, columns, dtype_mix):
+        return get_payload_bytes(get_dataset_config(self.df)['data'][0]['rows'])
+
+    track_payload_bytes.unit = 'bytes'
+
+
+class PandasGetDataAndSchema:
+    params = (ROWS, COLUMNS, DTYPE_MIXES)
+    param_names = ['rows', 'columns', 'dtype_mix']
+    timeout = 300
+
+    def setup(self, rows, columns, dtype_mix):
+        self.df = make_dataframe(rows, columns, dtype_mix)
+
+    def time_pandas_get_data_and_schema(self, rows, columns, dtype_mix):
+        pandas_get_data_and_schema(self.df)
+
+    def peakmem_pandas_get_data_and_schema(self, rows, columns, dtype_mix):
+        pandas_get_data_and_schema(self.df)
+
+    def track_payload_bytes(self, rows, columns, dtype_mix):
+        return get_payload_bytes(pandas_get_data_and_schema(self.df)[1])
+
+    track_payload_bytes.unit = 'bytes'
+
+
+class PysparkGetDataAndSchema:
+    params = (ROWS, COLUMNS, DTYPE_MIXES)
+    param_names = ['rows', 'columns', 'dtype_mix']
+    timeout = 600
+
+    def setup(self, rows, columns, dtype_mix):
+        # The DataFrame is cached, so only its conversion and collection are measured
+        self.df = get_spark_session().createDataFrame(make_dataframe(rows, columns, dtype_mix)).cache()
+        self.df.count()
+
+    def teardown(self, rows, columns, dtype_mix):
+        self.df.unpersist()
+
+    def time_pyspark_get_data_and_schema(self, rows, columns, dtype_mix):
+        pyspark_get_data_and_schema(self.df)
+
+    def peakmem_pyspark_get_data_and_schema(self, rows, columns, dtype_mix):
+        pyspark_get_data_and_schema(self.df)
+
+    def track_payload_bytes(self, rows, columns, dtype_mix):
+        return get_payload_bytes(pyspark_get_data_and_schema(self.df)[1])
+
+    track_payload_bytes.unit = 'bytes'
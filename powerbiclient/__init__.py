@@ -11,4 +11,4 @@ from ._version import __version__, version_info
 
 from .nbextension import _jupyter_nbextension_paths
 
-from .utils import get_dataset_config
+from .utils import estimate_dataset_config_size, get_dataset_config, get_dataset_config_from_path, instrument_conversion
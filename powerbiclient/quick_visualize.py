@@ -14,7 +14,41 @@ from traitlets import Bool, Dict, Float, HasTraits, Unicode, TraitError, validat
 from . import authentication
 from .report import Report
 from ._version import __version__
-from .utils import MODULE_NAME, is_dataset_create_config_valid, get_access_token_details
+from .utils import MODULE_NAME, METADATA_KEY, SUPPORTED_WIRE_FORMATS, LazyRows, dictionary_encode_columns_values, estimate_dataset_config_bytes, get_dataset_create_config_rows_error, is_dataset_create_config_valid, get_access_token_details
+
+
+def embed_config_to_json(embed_config, widget):
+    """ Serialize the embed configuration, with the data of the tables in the wire format of the widget:
+        - 'rows' - Lists of rows, lazy rows are sent as binary buffers of JSON lists of rows, one buffer per chunk
+        - 'columns' - Lists of the values of each column, lazy rows are sent as binary buffers of JSON lists of column values, one buffer per chunk
+        - 'dictionary' - As 'columns', with the text columns with repeated values sent as their distinct values and the code of each value
+    """
+    dataset_create_config = embed_config.get('datasetCreateConfig')
+    if not dataset_create_config or (widget._wire_format == 'rows' and not any(isinstance(table['rows'], LazyRows) for table in dataset_create_config['data'])):
+        return embed_config
+
+    tables_columns = {table['name']: table['columns'] for table in dataset_create_config['tableSchemaList']}
+    data = [table_data_to_json(table, tables_columns[table['name']], widget._wire_format) for table in dataset_create_config['data']]
+
+    return dict(embed_config, datasetCreateConfig=dict(dataset_create_config, data=data))
+
+
+def table_data_to_json(table, columns, wire_format):
+    rows = table['rows']
+
+    if isinstance(rows, LazyRows):
+        chunks_key = 'rowsChunks' if wire_format == 'rows' else 'columnsValuesChunks'
+        return {'name': table['name'], chunks_key: list(rows.iter_json_chunks(wire_format=wire_format))}
+    elif wire_format == 'rows':
+        return table
+
+    # The brackets of each row are sent once per column instead
+    columns_values = [list(column_values) for column_values in zip(*rows)]
+
+    if wire_format == 'dictionary':
+        columns_values = dictionary_encode_columns_values(columns_values, [column['dataType'] for column in columns])
+
+    return {'name': table['name'], 'columnsValues': columns_values}
 
 
 class QuickVisualize(DOMWidget, HasTraits):
@@ -58,12 +92,15 @@ class QuickVisualize(DOMWidget, HasTraits):
     # Authentication object
     _auth = None
 
+    # Format of the data of the tables sent to the front-end, one of SUPPORTED_WIRE_FORMATS
+    _wire_format = 'rows'
+
     # Widget specific properties.
     # Widget properties are defined as traitlets. Any property tagged with `sync=True`
     # is automatically synced to the frontend *any* time it changes in Python.
     # It is synced back to Python from the frontend *any* time the model is touched in frontend.
 
-    _embed_config = Dict(EMBED_CONFIG_DEFAULT_STATE).tag(sync=True)
+    _embed_config = Dict(EMBED_CONFIG_DEFAULT_STATE).tag(sync=True, to_json=embed_config_to_json)
     _embedded = Bool(False).tag(sync=True)
     _token_expired = Bool(TOKEN_EXPIRED_DEFAULT_STATE).tag(sync=True)
     _event_data = Dict(EVENT_DATA_DEFAULT_STATE).tag(sync=True)
@@ -93,13 +130,14 @@ class QuickVisualize(DOMWidget, HasTraits):
             raise Exception(change['new'])
 
     # Methods
-    def __init__(self, dataset_create_config, auth=None, **kwargs):
+    def __init__(self, dataset_create_config, auth=None, max_bytes=None, strict=False, wire_format='rows', **kwargs):
         """Create an instance of Quick Visualization in Power BI
 
         Args:
             dataset_create_config (object): Required.
                 A dict representing the data used to create the report, formatted as IDatasetCreateConfiguration
                 (See: https://learn.microsoft.com/en-us/javascript/api/overview/powerbi/embed-quick-report#step-11---create-a-dataset-without-a-data-source)
+                Its rows can be LazyRows returned by get_dataset_config(df, lazy=True), which are converted one chunk at a time when they are sent
 
             auth (string or object): Optional.
                 We have 3 authentication options to embed Power BI quick visualization:
@@ -107,10 +145,38 @@ class QuickVisualize(DOMWidget, HasTraits):
                  - Authentication object (object) - instance of AuthenticationResult (DeviceCodeLoginAuthentication or InteractiveLoginAuthentication)
                  - If not provided, Power BI user will be authenticated using Device Flow authentication
 
+            max_bytes (int): Optional.
+                Maximum estimated JSON size in bytes of the dataset rows, an exception is raised before authenticating and sending the rows when it is bigger
+
+            strict (bool): Optional.
+                Validate the columns and rows of the tables before authenticating and sending the rows: column data types, row widths and string values
+
+            wire_format (string): Optional.
+                The format of the tables data sent to the front-end, which expands it into rows for Power BI:
+                 - 'rows' - A list of values per row
+                 - 'columns' - A list of values per column, smaller to send. Lazy rows are then sent without creating a list per row
+                 - 'dictionary' - As 'columns', with the text columns with repeated values sent as their distinct values and a binary buffer of codes
+
         Returns:
             object: QuickVisualize object
         """
 
+        if wire_format not in SUPPORTED_WIRE_FORMATS:
+            raise Exception(f"Unsupported wire_format '{wire_format}', supported wire formats are: {SUPPORTED_WIRE_FORMATS}")
+
+        if strict and is_dataset_create_config_valid(dataset_create_config):
+            rows_error = get_dataset_create_config_rows_error(dataset_create_config)
+            if rows_error is not None:
+                raise Exception(f"Invalid datasetCreateConfig: {rows_error}")
+
+        if max_bytes is not None and is_dataset_create_config_valid(dataset_create_config):
+            estimated_bytes = estimate_dataset_config_bytes(dataset_create_config)
+            if estimated_bytes > max_bytes:
+                raise Exception(f"Dataset create configuration estimated size of {estimated_bytes} bytes is bigger than max_bytes {max_bytes}, "
+                                "sample the DataFrame using get_dataset_config(df, max_bytes=...)")
+
+        self._wire_format = wire_format
+
         self.observe(self._on_saved_report_id_change, '_saved_report_id')
 
         access_token = get_access_token_details(
@@ -167,6 +233,10 @@ class QuickVisualize(DOMWidget, HasTraits):
         """
             Set embed configuration parameters of Power BI quick visualization
         """
+        if dataset_create_config and METADATA_KEY in dataset_create_config:
+            # Metadata describes how the DataFrame was transformed and is not part of IDatasetCreateConfiguration
+            dataset_create_config = {key: value for key, value in dataset_create_config.items() if key != METADATA_KEY}
+
         self._embed_config = {
             'accessToken': access_token or self._embed_config['accessToken'],
             'datasetCreateConfig': dataset_create_config or self._embed_config['datasetCreateConfig'],
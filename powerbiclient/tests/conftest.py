@@ -4,7 +4,9 @@
 # Copyright (c) Microsoft.
 # Distributed under the terms of the Modified BSD License.
 
+import os
 import pytest
+import shutil
 
 from ipykernel.comm import Comm
 from ipywidgets import Widget
@@ -51,3 +53,24 @@ def mock_comm():
             delattr(Widget, attr)
         else:
             setattr(Widget, attr, value)
+
+
+@pytest.fixture(scope='session')
+def spark():
+    # A local SparkSession requires Java
+    if shutil.which('java') is None and 'JAVA_HOME' not in os.environ:
+        pytest.skip("Java is not installed")
+
+    from pyspark.sql import SparkSession
+
+    spark = (SparkSession.builder
+             .master('local[2]')
+             .appName('powerbiclient-tests')
+             .config('spark.ui.enabled', 'false')
+             .config('spark.sql.shuffle.partitions', '2')
+             .config('spark.sql.session.timeZone', 'UTC')
+             .getOrCreate())
+
+    yield spark
+
+    spark.stop()
@@ -5,10 +5,13 @@
 # Licensed under the MIT license.
 
 from pytest import raises
+import json
+import pandas as pd
 import unittest
 from unittest.mock import patch
 from ..quick_visualize import QuickVisualize
 from ..report import Report
+from ..utils import get_dataset_config
 from .. import authentication
 from .utils import create_test_report, ACCESS_TOKEN, REPORT_ID, INITIAL_REPORT_ID
 
@@ -42,6 +45,39 @@ class TestQuickVisualizeConstructor:
         assert qv._embed_config == EMBED_CONFIG
         assert qv._embedded == False
 
+    def test_quick_visualize_constructor_within_max_bytes(self):
+        # Act
+        qv = QuickVisualize(auth=ACCESS_TOKEN, dataset_create_config=DATASET_CREATE_CONFIG, max_bytes=1024)
+
+        # Assert
+        assert qv._embed_config == EMBED_CONFIG
+
+    def test_quick_visualize_constructor_strict(self):
+        # Arrange
+        dataset_create_config = dict(DATASET_CREATE_CONFIG, data=[{'name': "Table", 'rows': [["test1"], ["test2", "test3"]]}])
+
+        # Act + Assert
+        with raises(Exception, match="Row 1 of table 'Table' has 2 values instead of 1"):
+            QuickVisualize(auth=ACCESS_TOKEN, dataset_create_config=dataset_create_config, strict=True)
+
+    def test_quick_visualize_constructor_exceeding_max_bytes(self):
+        # Act + Assert
+        with raises(Exception, match="is bigger than max_bytes 10"):
+            QuickVisualize(auth=ACCESS_TOKEN, dataset_create_config=DATASET_CREATE_CONFIG, max_bytes=10)
+
+    def test_quick_visualize_constructor_lazy_rows_exceeding_max_bytes(self):
+        # Arrange
+        dataset_create_config = get_dataset_config(pd.DataFrame({'Name': ['test1', 'test2']}), lazy=True)
+
+        # Act + Assert
+        with raises(Exception, match="is bigger than max_bytes 10"):
+            QuickVisualize(auth=ACCESS_TOKEN, dataset_create_config=dataset_create_config, max_bytes=10)
+
+    def test_quick_visualize_constructor_unsupported_wire_format(self):
+        # Act + Assert
+        with raises(Exception, match="Unsupported wire_format 'arrow'"):
+            QuickVisualize(auth=ACCESS_TOKEN, dataset_create_config=DATASET_CREATE_CONFIG, wire_format='arrow')
+
 
 class TestComm:
     def test_sending_message(self, mock_comm):
@@ -64,6 +100,75 @@ class TestComm:
             'container_width': new_width
         }
 
+    def test_sending_lazy_rows_chunks(self):
+        # Arrange
+        dataset_create_config = get_dataset_config(pd.DataFrame({'Name': ['test1', 'test2']}), lazy=True)
+        qv = QuickVisualize(auth=ACCESS_TOKEN, dataset_create_config=dataset_create_config)
+
+        # Act
+        state = qv.get_state('_embed_config')
+
+        # Assert that lazy rows are sent as chunks of JSON encoded rows
+        table = state['_embed_config']['datasetCreateConfig']['data'][0]
+        assert table['name'] == 'Table'
+        assert [row for rows_chunk in table['rowsChunks'] for row in json.loads(rows_chunk)] == DATASET_CREATE_CONFIG['data'][0]['rows']
+
+    def test_sending_columns_values(self):
+        # Arrange
+        dataset_create_config = dict(DATASET_CREATE_CONFIG, tableSchemaList=[{'name': "Table", 'columns': [{'name': "Name", 'dataType': "Text"}, {'name': "Id", 'dataType': "Number"}]}],
+                                     data=[{'name': "Table", 'rows': [["test1", "1"], ["test2", "2"]]}])
+        qv = QuickVisualize(auth=ACCESS_TOKEN, dataset_create_config=dataset_create_config, wire_format='columns')
+
+        # Act
+        state = qv.get_state('_embed_config')
+
+        # Assert that the rows are sent as the values of each column, without changing the dataset create configuration
+        assert state['_embed_config']['datasetCreateConfig']['data'] == [{'name': "Table", 'columnsValues': [["test1", "test2"], ["1", "2"]]}]
+        assert qv._embed_config['datasetCreateConfig'] == dataset_create_config
+
+    def test_sending_lazy_rows_columns_values_chunks(self):
+        # Arrange
+        dataset_create_config = get_dataset_config(pd.DataFrame({'Name': ['test1', 'test2']}), lazy=True)
+        qv = QuickVisualize(auth=ACCESS_TOKEN, dataset_create_config=dataset_create_config, wire_format='columns')
+
+        # Act
+        state = qv.get_state('_embed_config')
+
+        # Assert
+        table = state['_embed_config']['datasetCreateConfig']['data'][0]
+        assert [json.loads(columns_values_chunk) for columns_values_chunk in table['columnsValuesChunks']] == [[["test1", "test2"]]]
+
+    def test_sending_dictionary_encoded_text_columns(self):
+        # Arrange
+        dataset_create_config = dict(DATASET_CREATE_CONFIG, tableSchemaList=[{'name': "Table", 'columns': [{'name': "Region", 'dataType': "Text"}, {'name': "Id", 'dataType': "Text"}]}],
+                                     data=[{'name': "Table", 'rows': [["north", "1"], ["south", "2"], ["north", "3"], ["north", "4"]]}])
+        qv = QuickVisualize(auth=ACCESS_TOKEN, dataset_create_config=dataset_create_config, wire_format='dictionary')
+
+        # Act
+        state = qv.get_state('_embed_config')
+
+        # Assert that only the text columns with repeated values are dictionary encoded, with binary codes
+        region_values, id_values = state['_embed_config']['datasetCreateConfig']['data'][0]['columnsValues']
+        assert region_values['dictionary'] == ["north", "south"]
+        assert region_values['codesType'] == 'uint8'
+        assert bytes(region_values['codes']) == bytes([0, 1, 0, 0])
+        assert id_values == ["1", "2", "3", "4"]
+
+    def test_sending_lazy_rows_dictionary_encoded_chunks(self):
+        # Arrange
+        dataset_create_config = get_dataset_config(pd.DataFrame({'Region': ['north', 'south', 'north', 'north'], 'Amount': [1, 1, 1, 1]}), lazy=True)
+        qv = QuickVisualize(auth=ACCESS_TOKEN, dataset_create_config=dataset_create_config, wire_format='dictionary')
+
+        # Act
+        state = qv.get_state('_embed_config')
+
+        # Assert that text columns are dictionary encoded in each chunk, with JSON codes
+        table = state['_embed_config']['datasetCreateConfig']['data'][0]
+        assert [json.loads(columns_values_chunk) for columns_values_chunk in table['columnsValuesChunks']] == [
+            [{'dictionary': ["north", "south"], 'codesType': 'uint8', 'codes': [0, 1, 0, 0]}, ["1", "1", "1", "1"]]
+        ]
+
+
 class TestUpdateEmbedConfig:
     def test_update_access_token(self):
         # Arrange
@@ -102,6 +207,19 @@ class TestUpdateEmbedConfig:
         }
         assert qv._embedded == False
 
+    def test_update_dataset_create_config_without_metadata(self):
+        # Arrange
+        qv = QuickVisualize(auth=ACCESS_TOKEN,
+                            dataset_create_config=DATASET_CREATE_CONFIG)
+        new_dataset_create_config = dict(DATASET_CREATE_CONFIG, metadata={'aggregation': {}})
+
+        # Act
+        qv._update_embed_config(
+            dataset_create_config=new_dataset_create_config)
+
+        # Assert - metadata is not sent to Power BI
+        assert qv._embed_config == EMBED_CONFIG
+
 
 class TestChangingNewContainerSize:
     def test_change_size(self):
@@ -5,13 +5,18 @@
 # Licensed under the MIT license.
 
 from pytest import raises
+import datetime
+import io
+import json
+import numpy as np
 import pandas as pd
+import re
 from unittest.mock import MagicMock
 import pytest
 
 from ..authentication import AuthenticationResult
 from ..report import Report
-from ..utils import get_access_token_details, get_dataset_config, is_dataset_create_config_valid
+from ..utils import DatasetConfigCache, LazyRows, dataset_config_cache, estimate_dataset_config_size, get_access_token_details, get_dataset_config, get_dataset_config_from_path, instrument_conversion, is_dataset_create_config_valid
 
 ACCESS_TOKEN = 'dummy_access_token'
 LOCALE = 'dummy_locale'
@@ -42,11 +47,21 @@ class TestGetAccessTokenDetails:
         with raises(Exception):
             get_access_token_details(powerbi_widget=Report, auth=invalid_auth)
 
+
 class TestIsDatasetCreateConfigValid:
     def test_happy_path(self):
         assert is_dataset_create_config_valid(
             {'locale': LOCALE, 'tableSchemaList': TABLE_SCHEMA_LIST, 'data': DATA})
 
+    def test_happy_path_with_metadata(self):
+        assert is_dataset_create_config_valid(
+            {'locale': LOCALE, 'tableSchemaList': TABLE_SCHEMA_LIST, 'data': DATA, 'metadata': {}})
+
+    def test_happy_path_multiple_tables(self):
+        assert is_dataset_create_config_valid({'locale': LOCALE, 'tableSchemaList': [
+            {'name': 'table1', 'columns': TABLE_SCHEMA_COLUMNS}, {'name': 'table2', 'columns': TABLE_SCHEMA_COLUMNS}], 'data': [
+            {'name': 'table2', 'rows': DATA_ROWS}, {'name': 'table1', 'rows': DATA_ROWS}]})
+
     def test_invalid_config(self):
         # dataset_create_config is None
         assert not is_dataset_create_config_valid(None)
@@ -87,6 +102,17 @@ class TestIsDatasetCreateConfigValid:
         assert not is_dataset_create_config_valid({'locale': LOCALE, 'tableSchemaList': [
                                                   {'name': 'dummy_table_name'}], 'data': DATA})
 
+    def test_invalid_multiple_tables(self):
+        # tables have the same name
+        assert not is_dataset_create_config_valid({'locale': LOCALE, 'tableSchemaList': [
+            {'name': 'table1', 'columns': TABLE_SCHEMA_COLUMNS}, {'name': 'table1', 'columns': TABLE_SCHEMA_COLUMNS}], 'data': [
+            {'name': 'table1', 'rows': DATA_ROWS}, {'name': 'table1', 'rows': DATA_ROWS}]})
+
+        # table does not have data
+        assert not is_dataset_create_config_valid({'locale': LOCALE, 'tableSchemaList': [
+            {'name': 'table1', 'columns': TABLE_SCHEMA_COLUMNS}, {'name': 'table2', 'columns': TABLE_SCHEMA_COLUMNS}], 'data': [
+            {'name': 'table1', 'rows': DATA_ROWS}]})
+
     def test_invalid_data(self):
         # data key does not exist
         assert not is_dataset_create_config_valid(
@@ -108,6 +134,31 @@ class TestIsDatasetCreateConfigValid:
         assert not is_dataset_create_config_valid(
             {'locale': LOCALE, 'tableSchemaList': TABLE_SCHEMA_LIST, 'data': [{'name': 'dummy_table_name'}]})
 
+    def test_strict_happy_path(self):
+        assert is_dataset_create_config_valid(get_dataset_config(pd.DataFrame({'col1': [1, 2], 'col2': ['a', None]})), strict=True)
+
+    def test_strict_invalid_rows(self):
+        def create_config(columns, rows):
+            return {'locale': LOCALE, 'tableSchemaList': [{'name': 'dummy_table_name', 'columns': columns}], 'data': [{'name': 'dummy_table_name', 'rows': rows}]}
+
+        # Valid without strict validation
+        assert is_dataset_create_config_valid(create_config(TABLE_SCHEMA_COLUMNS, DATA_ROWS))
+
+        # Value is not a string
+        assert not is_dataset_create_config_valid(create_config(TABLE_SCHEMA_COLUMNS, DATA_ROWS), strict=True)
+
+        # Row has a wrong width
+        assert not is_dataset_create_config_valid(create_config(TABLE_SCHEMA_COLUMNS, [['1'], ['1', '2']]), strict=True)
+
+        # Row is not a list
+        assert not is_dataset_create_config_valid(create_config(TABLE_SCHEMA_COLUMNS, [['1'], '1']), strict=True)
+
+        # Column has an unknown data type
+        assert not is_dataset_create_config_valid(create_config([{'name': 'col1', 'dataType': 'Float'}], [['1']]), strict=True)
+
+        # Duplicate column names
+        assert not is_dataset_create_config_valid(create_config(TABLE_SCHEMA_COLUMNS * 2, [['1', '2']]), strict=True)
+
 
 class TestGetDatasetCreateConfig:
     ALL_TYPES_DATA = {
@@ -172,3 +223,1136 @@ class TestGetDatasetCreateConfig:
 
         with pytest.raises(Exception):
             get_dataset_config(df)
+
+    def test_na_values_converted_to_empty_strings(self):
+        df = pd.DataFrame({
+            'text': pd.Series(['a', None], dtype='str'),
+            'number': pd.Series([1.5, None], dtype='float'),
+            'bool': pd.Series([True, None]),
+            'datetime': pd.Series([pd.Timestamp('2022-10-27 10:50'), pd.NaT]),
+        })
+        dataset_create_config = get_dataset_config(df)
+
+        rows = dataset_create_config['data'][0]['rows']
+        assert rows == [['a', '1.5', 'True', '2022-10-27 10:50:00'], ['', '', '', '']]
+
+    def test_object_columns_without_na(self):
+        df = pd.DataFrame({
+            'bool': pd.Series([True, False], dtype='object'),
+            'number': pd.Series([1, 2.5], dtype='object'),
+            'datetime': pd.Series([pd.Timestamp('2022-10-27'), pd.Timestamp('2022-10-28')], dtype='object'),
+            'mixed': pd.Series([1, 'a'], dtype='object'),
+        })
+        dataset_create_config = get_dataset_config(df)
+
+        # Object columns take the dtype of their values
+        columns_types = [col['dataType'] for col in dataset_create_config['tableSchemaList'][0]['columns']]
+        assert columns_types == ['Logical', 'Number', 'DateTime', 'Text']
+        assert dataset_create_config['data'][0]['rows'] == [['true', '1.0', '2022-10-27', '1'], ['false', '2.5', '2022-10-28', 'a']]
+        assert list(get_dataset_config(df, lazy=True)['data'][0]['rows']) == dataset_create_config['data'][0]['rows']
+
+    def test_df_is_not_modified(self):
+        df = pd.DataFrame({
+            'bool': pd.Series([True, False], dtype='bool'),
+            'number': pd.Series([1.2, None], dtype='float'),
+        })
+        expected_df = df.copy()
+        get_dataset_config(df)
+
+        pd.testing.assert_frame_equal(df, expected_df)
+
+    def test_df_without_columns(self):
+        dataset_create_config = get_dataset_config(pd.DataFrame(index=range(2)))
+
+        assert dataset_create_config['tableSchemaList'][0]['columns'] == []
+        assert dataset_create_config['data'][0]['rows'] == [[], []]
+
+    def test_unsupported_engine(self):
+        with pytest.raises(Exception):
+            get_dataset_config(pd.DataFrame([1, 2, 3]), engine='dummy_engine')
+
+
+class TestGetDatasetCreateConfigReduce:
+    DATA = {
+        'region': pd.Series(['a', 'b', 'a', None], dtype='str'),
+        'flag': pd.Series([True, False, True, True], dtype='bool'),
+        'sales': pd.Series([1.5, 2, 3, None], dtype='float'),
+    }
+
+    def test_aggregate_sum(self):
+        dataset_create_config = get_dataset_config(pd.DataFrame(self.DATA), reduce='aggregate')
+        assert is_dataset_create_config_valid(dataset_create_config)
+
+        rows = dataset_create_config['data'][0]['rows']
+        assert rows == [['a', 'true', '4.5'], ['b', 'false', '2.0'], ['', 'true', '']]
+        assert dataset_create_config['metadata']['aggregation'] == {
+            'function': 'sum',
+            'group_by_columns': ['region', 'flag'],
+            'aggregated_columns': ['sales']
+        }
+
+    def test_aggregate_count(self):
+        dataset_create_config = get_dataset_config(pd.DataFrame(self.DATA), reduce='aggregate', aggregation='count')
+
+        rows = dataset_create_config['data'][0]['rows']
+        assert rows == [['a', 'true', '2'], ['b', 'false', '1'], ['', 'true', '0']]
+        assert dataset_create_config['metadata']['aggregation']['function'] == 'count'
+
+    def test_aggregate_without_group_by_columns(self):
+        df = pd.DataFrame({'units': pd.Series([1, 2], dtype='int32'), 'sales': pd.Series([None, None], dtype='float')})
+
+        dataset_create_config = get_dataset_config(df, reduce='aggregate')
+
+        assert dataset_create_config['tableSchemaList'][0]['columns'] == [{'name': 'units', 'dataType': 'Int32'}, {'name': 'sales', 'dataType': 'Text'}]
+        assert dataset_create_config['data'][0]['rows'] == [['3', '']]
+
+    def test_no_reduce_has_no_metadata(self):
+        dataset_create_config = get_dataset_config(pd.DataFrame(self.DATA))
+        assert 'metadata' not in dataset_create_config
+
+    def test_unsupported_reduce(self):
+        with pytest.raises(Exception):
+            get_dataset_config(pd.DataFrame(self.DATA), reduce='dummy_reduce')
+
+        with pytest.raises(Exception):
+            get_dataset_config(pd.DataFrame(self.DATA), reduce='aggregate', aggregation='dummy_aggregation')
+
+
+class TestGetDatasetCreateConfigSampling:
+    DATA = {
+        'region': pd.Series(['a'] * 80 + ['b'] * 15 + [None] * 5, dtype='str'),
+        'value': pd.Series(range(100), dtype='int'),
+    }
+
+    def test_max_rows(self):
+        dataset_create_config = get_dataset_config(pd.DataFrame(self.DATA), max_rows=10)
+        assert is_dataset_create_config_valid(dataset_create_config)
+
+        rows = dataset_create_config['data'][0]['rows']
+        values = [int(row[1]) for row in rows]
+        assert len(rows) == 10
+        assert values == sorted(values)
+
+        sampling = dataset_create_config['metadata']['sampling']
+        assert sampling['rows_count'] == 100
+        assert sampling['sampled_rows_count'] == 10
+        assert sampling['fraction'] == 0.1
+
+    def test_max_bytes(self):
+        max_bytes = 500
+        dataset_create_config = get_dataset_config(pd.DataFrame(self.DATA), max_bytes=max_bytes)
+
+        rows = dataset_create_config['data'][0]['rows']
+        assert 0 < len(rows) < 100
+        assert len(json.dumps(rows)) <= max_bytes
+
+    def test_same_seed_same_sample(self):
+        df = pd.DataFrame(self.DATA)
+        assert get_dataset_config(df, max_rows=10, sample_seed=1) == get_dataset_config(df, max_rows=10, sample_seed=1)
+        assert get_dataset_config(df, max_rows=10, sample_seed=1) != get_dataset_config(df, max_rows=10, sample_seed=2)
+
+    def test_stratify_by(self):
+        dataset_create_config = get_dataset_config(pd.DataFrame(self.DATA), max_rows=20, stratify_by='region')
+
+        regions = [row[0] for row in dataset_create_config['data'][0]['rows']]
+        assert {region: regions.count(region) for region in set(regions)} == {'a': 16, 'b': 3, '': 1}
+
+    def test_stratify_by_many_values(self):
+        df = pd.DataFrame({'region': [f'region{value // 2}' for value in range(200)], 'value': range(200)})
+
+        dataset_create_config = get_dataset_config(df, max_rows=10, stratify_by='region')
+
+        rows = dataset_create_config['data'][0]['rows']
+        assert len(rows) == 10
+        assert len({row[0] for row in rows}) == 10
+        assert dataset_create_config['metadata']['sampling']['fraction'] == 0.05
+
+    def test_stratify_by_keeps_small_values_within_budget(self):
+        df = pd.DataFrame({'region': ['a'] * 60 + ['b'] * 60 + [f'region{value}' for value in range(8)], 'value': range(128)})
+
+        regions = [row[0] for row in get_dataset_config(df, max_rows=10, stratify_by='region')['data'][0]['rows']]
+
+        assert len(regions) == 10
+        assert len(set(regions)) == 10
+
+    def test_under_budget_is_not_sampled(self):
+        dataset_create_config = get_dataset_config(pd.DataFrame(self.DATA), max_rows=1000)
+
+        assert len(dataset_create_config['data'][0]['rows']) == 100
+        assert dataset_create_config['metadata']['sampling']['fraction'] == 1.0
+
+    def test_invalid_stratify_by(self):
+        with pytest.raises(Exception):
+            get_dataset_config(pd.DataFrame(self.DATA), max_rows=10, stratify_by='dummy_column')
+
+
+class TestGetDatasetCreateConfigCache:
+    DATA = {
+        'col1': pd.Series(['a', 'b'], dtype='str'),
+        'col2': pd.Series([1.5, 2], dtype='float'),
+    }
+
+    def setup_method(self):
+        dataset_config_cache.clear()
+
+    def test_cache_hit(self):
+        dataset_create_config = get_dataset_config(pd.DataFrame(self.DATA), use_cache=True)
+        cached_dataset_create_config = get_dataset_config(pd.DataFrame(self.DATA), use_cache=True)
+
+        assert cached_dataset_create_config == dataset_create_config
+        assert dataset_config_cache.stats() == {'hits': 1, 'misses': 1, 'evictions': 0, 'size': 1, 'max_size': 8}
+
+    def test_cache_miss(self):
+        df = pd.DataFrame(self.DATA)
+        get_dataset_config(df, use_cache=True)
+
+        # Different locale
+        get_dataset_config(df, locale='he-IL', use_cache=True)
+
+        # Different values
+        changed_df = df.copy()
+        changed_df.loc[0, 'col2'] = 3
+        dataset_create_config = get_dataset_config(changed_df, use_cache=True)
+
+        assert dataset_create_config['data'][0]['rows'][0] == ['a', '3.0']
+        assert dataset_config_cache.stats()['misses'] == 3
+        assert dataset_config_cache.stats()['hits'] == 0
+
+    def test_no_cache(self):
+        get_dataset_config(pd.DataFrame(self.DATA))
+        get_dataset_config(pd.DataFrame(self.DATA))
+
+        assert dataset_config_cache.stats()['size'] == 0
+
+    def test_lru_eviction(self):
+        cache = DatasetConfigCache(max_size=2)
+        cache.put('key1', 1)
+        cache.put('key2', 2)
+        cache.get('key1')
+        cache.put('key3', 3)
+
+        assert cache.get('key2') is None
+        assert cache.get('key1') == 1
+        assert cache.get('key3') == 3
+        assert cache.stats() == {'hits': 3, 'misses': 1, 'evictions': 1, 'size': 2, 'max_size': 2}
+
+        cache.max_size = 1
+        assert cache.get('key1') is None
+        assert cache.stats()['size'] == 1
+
+
+class TestGetDatasetCreateConfigIncremental:
+    DATA = {
+        'col1': pd.Series(['a', 'b'], dtype='str'),
+        'col2': pd.Series([1.5, 2], dtype='float'),
+    }
+
+    def test_append_rows(self):
+        df = pd.DataFrame(self.DATA)
+        previous_dataset_create_config = get_dataset_config(df)
+
+        appended_df = pd.concat([df, pd.DataFrame({'col1': ['c'], 'col2': [3.5]})], ignore_index=True)
+        dataset_create_config = get_dataset_config(appended_df, previous_dataset_config=previous_dataset_create_config)
+        assert is_dataset_create_config_valid(dataset_create_config)
+
+        assert dataset_create_config['data'][0]['rows'] == [['a', '1.5'], ['b', '2.0'], ['c', '3.5']]
+        assert dataset_create_config['metadata']['incremental'] == {
+            'previous_rows_count': 2,
+            'appended_rows_count': 1,
+            'rebuilt': False,
+            'dtypes': ['object', 'float64']
+        }
+
+        # Previous dataset create configuration is not modified
+        assert len(previous_dataset_create_config['data'][0]['rows']) == 2
+
+    def test_schema_changed(self):
+        df = pd.DataFrame(self.DATA)
+        previous_dataset_create_config = get_dataset_config(df)
+
+        appended_df = pd.concat([df, pd.DataFrame({'col1': ['c'], 'col2': ['d']})], ignore_index=True)
+        dataset_create_config = get_dataset_config(appended_df, previous_dataset_config=previous_dataset_create_config)
+
+        assert dataset_create_config['metadata']['incremental']['rebuilt']
+        assert dataset_create_config['data'] == get_dataset_config(appended_df)['data']
+
+    def test_append_rows_after_na_values(self):
+        df = pd.DataFrame({'value': [1.5, None]})
+        previous_dataset_create_config = get_dataset_config(df)
+
+        appended_df = pd.concat([df, pd.DataFrame({'value': [3.5]})], ignore_index=True)
+        dataset_create_config = get_dataset_config(appended_df, previous_dataset_config=previous_dataset_create_config)
+
+        # The column is a text column because of the NA value of the previous rows
+        assert dataset_create_config['tableSchemaList'] == previous_dataset_create_config['tableSchemaList']
+        assert dataset_create_config['metadata']['incremental']['appended_rows_count'] == 1
+        assert not dataset_create_config['metadata']['incremental']['rebuilt']
+        assert dataset_create_config['data'] == get_dataset_config(appended_df)['data']
+
+    def test_dtype_promoted(self):
+        df = pd.DataFrame({'value': [1, 2]})
+        previous_dataset_create_config = get_dataset_config(df)
+
+        appended_df = pd.concat([df, pd.DataFrame({'value': [2.5]})], ignore_index=True)
+        dataset_create_config = get_dataset_config(appended_df, previous_dataset_config=previous_dataset_create_config)
+
+        assert dataset_create_config['metadata']['incremental']['rebuilt']
+        assert dataset_create_config['data'][0]['rows'] == [['1.0'], ['2.0'], ['2.5']]
+
+    def test_dtype_changed_since_previous_append(self):
+        df = pd.DataFrame({'value': [1.5, 2.5]})
+        previous_dataset_create_config = get_dataset_config(df, previous_dataset_config=get_dataset_config(df.head(1)))
+
+        appended_df = pd.concat([df, pd.DataFrame({'value': [3.5]})], ignore_index=True).astype('float32')
+        dataset_create_config = get_dataset_config(appended_df, previous_dataset_config=previous_dataset_create_config)
+
+        assert previous_dataset_create_config['metadata']['incremental']['dtypes'] == ['float64']
+        assert dataset_create_config['metadata']['incremental']['rebuilt']
+        assert dataset_create_config['data'] == get_dataset_config(appended_df)['data']
+
+    def test_datetime_precision_changed(self):
+        df = pd.DataFrame({'datetime': pd.to_datetime(['2022-01-01', '2022-01-02'])})
+        previous_dataset_create_config = get_dataset_config(df, use_cache=True)
+
+        appended_df = pd.concat([df, pd.DataFrame({'datetime': pd.to_datetime(['2022-01-03 10:30:00.5'])})], ignore_index=True)
+        dataset_create_config = get_dataset_config(appended_df, previous_dataset_config=previous_dataset_create_config, use_cache=True)
+
+        assert dataset_create_config['metadata']['incremental']['rebuilt']
+        assert dataset_create_config['data'][0]['rows'] == [['2022-01-01 00:00:00.000'], ['2022-01-02 00:00:00.000'], ['2022-01-03 10:30:00.500']]
+        assert dataset_create_config['data'] == get_dataset_config(appended_df)['data']
+
+    def test_datetime_tail_formatted_with_column_precision(self):
+        df = pd.DataFrame({'datetime': pd.to_datetime(['2022-01-01 10:00', '2022-01-02 11:00'])})
+        previous_dataset_create_config = get_dataset_config(df)
+
+        appended_df = pd.concat([df, pd.DataFrame({'datetime': pd.to_datetime(['2022-01-03'])})], ignore_index=True)
+        dataset_create_config = get_dataset_config(appended_df, previous_dataset_config=previous_dataset_create_config)
+
+        assert not dataset_create_config['metadata']['incremental']['rebuilt']
+        assert dataset_create_config['data'][0]['rows'][-1] == ['2022-01-03 00:00:00']
+
+    def test_invalid_previous_dataset_config(self):
+        with pytest.raises(Exception):
+            get_dataset_config(pd.DataFrame(self.DATA), previous_dataset_config={'locale': LOCALE})
+
+
+class TestGetDatasetCreateConfigMultipleTables:
+    def test_happy_path_multiple_tables(self):
+        dataset_create_config = get_dataset_config({
+            'Sales': pd.DataFrame({'product_id': pd.Series([1, 2], dtype='int32'), 'amount': [1.5, 2]}),
+            'Products': pd.DataFrame({'product_id': pd.Series([1, 2], dtype='int32'), 'name': ['a', 'b']}),
+        }, max_workers=2)
+        assert is_dataset_create_config_valid(dataset_create_config)
+
+        assert dataset_create_config['tableSchemaList'] == [
+            {'name': 'Sales', 'columns': [{'name': 'product_id', 'dataType': 'Int32'}, {'name': 'amount', 'dataType': 'Number'}]},
+            {'name': 'Products', 'columns': [{'name': 'product_id', 'dataType': 'Int32'}, {'name': 'name', 'dataType': 'Text'}]}
+        ]
+        assert dataset_create_config['data'] == [
+            {'name': 'Sales', 'rows': [['1', '1.5'], ['2', '2.0']]},
+            {'name': 'Products', 'rows': [['1', 'a'], ['2', 'b']]}
+        ]
+
+    def test_multiple_tables_metadata(self):
+        dataset_create_config = get_dataset_config({
+            'Table1': pd.DataFrame([1, 2, 3]),
+            'Table2': pd.DataFrame([4, 5, 6]),
+        }, max_rows=1)
+
+        tables_metadata = dataset_create_config['metadata']['tables']
+        assert tables_metadata['Table1']['sampling']['sampled_rows_count'] == 1
+        assert tables_metadata['Table2']['sampling']['sampled_rows_count'] == 1
+
+    def test_invalid_tables(self):
+        with pytest.raises(Exception):
+            get_dataset_config({})
+
+        with pytest.raises(Exception):
+            get_dataset_config({'': pd.DataFrame([1, 2, 3])})
+
+
+class TestGetDatasetCreateConfigNativeDataFrames:
+    EXPECTED_COLUMN_TYPES = ['Text', 'Logical', 'Int32', 'Number', 'DateTime', 'Date']
+    EXPECTED_ROWS = [
+        ['a', 'true', '1', '1.2', '2022-10-27 10:50:00', '2022-10-27'],
+        ['', 'false', '2', '', '', '2022-10-28']
+    ]
+
+    def assert_dataset_config(self, dataset_create_config):
+        assert is_dataset_create_config_valid(dataset_create_config)
+
+        columns_types = [col['dataType'] for col in dataset_create_config['tableSchemaList'][0]['columns']]
+        assert columns_types == self.EXPECTED_COLUMN_TYPES
+        assert dataset_create_config['data'][0]['rows'] == self.EXPECTED_ROWS
+
+    def test_polars_dataframe(self):
+        pl = pytest.importorskip('polars')
+        df = pl.DataFrame({
+            'str': ['a', None],
+            'bool': [True, False],
+            'int': pl.Series([1, 2], dtype=pl.Int32),
+            'number': [1.2, None],
+            'datetime': [datetime.datetime(2022, 10, 27, 10, 50), None],
+            'date': [datetime.date(2022, 10, 27), datetime.date(2022, 10, 28)],
+        })
+
+        self.assert_dataset_config(get_dataset_config(df))
+        self.assert_dataset_config(get_dataset_config(df.lazy()))
+
+    def test_duckdb_relation(self):
+        duckdb = pytest.importorskip('duckdb')
+        relation = duckdb.sql("""
+            SELECT * FROM (VALUES
+                ('a', true, 1::INTEGER, 1.2::DOUBLE, TIMESTAMP '2022-10-27 10:50:00', DATE '2022-10-27'),
+                (NULL, false, 2::INTEGER, NULL::DOUBLE, NULL::TIMESTAMP, DATE '2022-10-28')
+            ) t("str", "bool", "int", "number", "datetime", "date")
+        """)
+
+        self.assert_dataset_config(get_dataset_config(relation))
+
+    def test_arrow_table(self):
+        pa = pytest.importorskip('pyarrow')
+        table = pa.table({
+            'str': pa.array(['a', None]),
+            'bool': pa.array([True, False]),
+            'int': pa.array([1, 2], type=pa.int32()),
+            'number': pa.array([1.2, None]),
+            'datetime': pa.array([datetime.datetime(2022, 10, 27, 10, 50), None], type=pa.timestamp('us')),
+            'date': pa.array([datetime.date(2022, 10, 27), datetime.date(2022, 10, 28)]),
+        })
+
+        self.assert_dataset_config(get_dataset_config(table))
+
+    def test_dask_dataframe(self):
+        dd = pytest.importorskip('dask.dataframe')
+        df = pd.DataFrame({
+            'str': pd.Series(['a', None], dtype='str'),
+            'bool': pd.Series([True, False], dtype='bool'),
+            'int': pd.Series([1, 2], dtype='int32'),
+            'number': pd.Series([1.2, None], dtype='float'),
+            'datetime': pd.Series([pd.Timestamp('2022-10-27 10:50'), pd.NaT]),
+            'date': pd.Series(['2022-10-27', '2022-10-28'], dtype='str'),
+        })
+        dataset_create_config = get_dataset_config(dd.from_pandas(df, npartitions=2))
+        assert is_dataset_create_config_valid(dataset_create_config)
+
+        # Column types are taken from the Dask DataFrame meta
+        columns_types = [col['dataType'] for col in dataset_create_config['tableSchemaList'][0]['columns']]
+        assert columns_types == ['Text', 'Logical', 'Int32', 'Number', 'DateTime', 'Text']
+        assert dataset_create_config['data'][0]['rows'] == self.EXPECTED_ROWS
+
+
+class TestGetDatasetCreateConfigChunks:
+    CSV = 'str,int,number\na,1,1.5\nb,2,\n,3,2.5\n'
+
+    def test_csv_chunks(self):
+        dataset_create_config = get_dataset_config(pd.read_csv(io.StringIO(self.CSV), chunksize=2))
+
+        assert is_dataset_create_config_valid(dataset_create_config)
+        # Column types are inferred from the first chunk before filling missing values
+        columns_types = [col['dataType'] for col in dataset_create_config['tableSchemaList'][0]['columns']]
+        assert columns_types == ['Text', 'Number', 'Number']
+        assert dataset_create_config['data'][0]['rows'] == [['a', '1', '1.5'], ['b', '2', ''], ['', '3', '2.5']]
+
+    def test_chunks_generator(self):
+        df = pd.DataFrame({'str': ['a', 'b', 'c'], 'int': pd.Series([1, 2, 3], dtype='int32')})
+        chunks = (df.iloc[start:start + 2] for start in range(0, len(df), 2))
+
+        dataset_create_config = get_dataset_config(chunks, locale='de-DE')
+
+        assert dataset_create_config['locale'] == 'de-DE'
+        assert dataset_create_config['tableSchemaList'][0]['columns'] == [{'name': 'str', 'dataType': 'Text'}, {'name': 'int', 'dataType': 'Int32'}]
+        assert dataset_create_config['data'][0]['rows'] == [['a', '1'], ['b', '2'], ['c', '3']]
+
+    def test_chunk_with_missing_values_only(self):
+        chunks = iter([pd.DataFrame({'str': ['a', 'b']}), pd.DataFrame({'str': [None]}).astype('float')])
+
+        dataset_create_config = get_dataset_config(chunks)
+
+        assert dataset_create_config['tableSchemaList'][0]['columns'] == [{'name': 'str', 'dataType': 'Text'}]
+        assert dataset_create_config['data'][0]['rows'] == [['a'], ['b'], ['']]
+
+    def test_chunk_type_mismatch(self):
+        with raises(Exception, match="Column int has type Text"):
+            get_dataset_config(pd.read_csv(io.StringIO('int\n1\n2\nx\n'), chunksize=2))
+
+    def test_chunk_columns_mismatch(self):
+        with raises(Exception, match="do not match the columns of the first chunk"):
+            get_dataset_config(iter([pd.DataFrame({'a': [1]}), pd.DataFrame({'b': [1]})]))
+
+    def test_no_chunks(self):
+        with raises(Exception, match="No DataFrame chunks found"):
+            get_dataset_config(iter([]))
+
+    def test_chunks_unsupported_option(self):
+        with raises(Exception, match="DataFrame chunks support only the locale parameter"):
+            get_dataset_config(iter([pd.DataFrame({'a': [1]})]), reduce='aggregate')
+
+
+class TestGetDatasetCreateConfigFromPath:
+    DATA = {'str': ['a', None, 'c'], 'number': [1.5, 2.5, 3.5], 'year': [2023, 2024, 2024]}
+
+    def test_parquet_file(self, tmp_path):
+        pytest.importorskip('pyarrow')
+        df = pd.DataFrame(self.DATA)
+        df.to_parquet(tmp_path / 'sales.parquet', index=False)
+
+        dataset_create_config = get_dataset_config_from_path(tmp_path / 'sales.parquet')
+
+        assert is_dataset_create_config_valid(dataset_create_config)
+        assert dataset_create_config['tableSchemaList'][0]['columns'] == [
+            {'name': 'str', 'dataType': 'Text'}, {'name': 'number', 'dataType': 'Number'}, {'name': 'year', 'dataType': 'Number'}
+        ]
+        assert dataset_create_config['data'][0]['rows'] == [['a', '1.5', '2023'], ['', '2.5', '2024'], ['c', '3.5', '2024']]
+
+    def test_csv_file_columns_and_filter(self, tmp_path):
+        pc = pytest.importorskip('pyarrow.compute')
+        df = pd.DataFrame(self.DATA)
+        df.to_csv(tmp_path / 'sales.csv', index=False)
+
+        dataset_create_config = get_dataset_config_from_path(str(tmp_path / 'sales.csv'), columns=['str', 'number'], filter=pc.field('year') == 2024)
+
+        assert dataset_create_config['tableSchemaList'][0]['columns'] == [{'name': 'str', 'dataType': 'Text'}, {'name': 'number', 'dataType': 'Number'}]
+        assert dataset_create_config['data'][0]['rows'] == [['', '2.5'], ['c', '3.5']]
+
+    def test_partitioned_directory(self, tmp_path):
+        pc = pytest.importorskip('pyarrow.compute')
+        df = pd.DataFrame(self.DATA)
+        df.to_parquet(tmp_path, partition_cols=['year'], index=False)
+
+        dataset_create_config = get_dataset_config_from_path(tmp_path, filter=pc.field('year') == 2023)
+
+        assert dataset_create_config['data'][0]['rows'] == [['a', '1.5', '2023']]
+
+    def test_missing_columns(self, tmp_path):
+        pytest.importorskip('pyarrow')
+        df = pd.DataFrame(self.DATA)
+        df.to_parquet(tmp_path / 'sales.parquet', index=False)
+
+        with raises(Exception, match="Columns \\['region'\\] are not found"):
+            get_dataset_config_from_path(tmp_path / 'sales.parquet', columns=['region'])
+
+    def test_unsupported_file_format(self, tmp_path):
+        pytest.importorskip('pyarrow')
+        (tmp_path / 'sales.json').write_text('{}')
+
+        with raises(Exception, match="Unsupported file format"):
+            get_dataset_config_from_path(tmp_path / 'sales.json')
+
+    def test_missing_path(self, tmp_path):
+        pytest.importorskip('pyarrow')
+
+        with raises(Exception, match="is not found"):
+            get_dataset_config_from_path(tmp_path / 'sales.parquet')
+
+
+class TestGetDatasetCreateConfigParallelColumns:
+    DATA = {
+        'str': ['a', None, 'c'],
+        'bool': [True, False, True],
+        'int': pd.Series([1, 2, 3], dtype='int32'),
+        'number': [1.5, None, 3.5],
+        'datetime': [pd.Timestamp('2022-10-27 10:50'), pd.NaT, pd.Timestamp('2022-10-28')],
+    }
+
+    @pytest.mark.parametrize('column_pool', ['process', 'thread'])
+    def test_parallel_columns(self, column_pool, monkeypatch):
+        df = pd.DataFrame(self.DATA)
+
+        monkeypatch.setattr('powerbiclient.utils.PARALLEL_MIN_CELLS', 0)
+
+        assert get_dataset_config(df, column_workers=2, column_pool=column_pool) == get_dataset_config(df)
+
+    def test_more_workers_than_columns(self, monkeypatch):
+        df = pd.DataFrame(self.DATA)
+
+        monkeypatch.setattr('powerbiclient.utils.PARALLEL_MIN_CELLS', 0)
+
+        assert get_dataset_config(df, column_workers=10, column_pool='thread') == get_dataset_config(df)
+
+    def test_small_dataframe_converted_serially(self, monkeypatch):
+        df = pd.DataFrame(self.DATA)
+
+        def fail(*args):
+            raise AssertionError("Small DataFrames should be converted serially")
+
+        monkeypatch.setattr('powerbiclient.utils.pandas_convert_columns_in_parallel', fail)
+
+        assert get_dataset_config(df, column_workers=2) == get_dataset_config(df)
+
+    def test_invalid_column_workers(self):
+        with raises(Exception, match="Parameter column_workers should be at least 1"):
+            get_dataset_config(pd.DataFrame(self.DATA), column_workers=0)
+
+    def test_unsupported_column_pool(self):
+        with raises(Exception, match="Unsupported column_pool"):
+            get_dataset_config(pd.DataFrame(self.DATA), column_workers=2, column_pool='gpu')
+
+
+class TestGetDatasetCreateConfigLowCardinality:
+    def get_rows(self, df):
+        return get_dataset_config(df)['data'][0]['rows']
+
+    def test_low_cardinality_columns(self):
+        df = pd.DataFrame({
+            'str': ['a', None, 'a', 'a'],
+            'number': [1.5, 1.5, None, 1.5],
+            'datetime': pd.Series([pd.Timestamp('2022-10-27'), pd.NaT, pd.Timestamp('2022-10-27'), pd.Timestamp('2022-10-27')]),
+            'datetime_tz': pd.Series([pd.Timestamp('2022-10-27'), pd.NaT, pd.Timestamp('2022-10-27'), pd.Timestamp('2022-10-27')]).dt.tz_localize('UTC'),
+        })
+
+        dataset_create_config = get_dataset_config(df)
+
+        # NaT values keep the type of datetime columns, other missing values make the column a text column
+        assert dataset_create_config['tableSchemaList'][0]['columns'] == [{'name': 'str', 'dataType': 'Text'}, {'name': 'number', 'dataType': 'Text'},
+                                                                          {'name': 'datetime', 'dataType': 'DateTime'}, {'name': 'datetime_tz', 'dataType': 'DateTimeZone'}]
+        assert dataset_create_config['data'][0]['rows'] == [['a', '1.5', '2022-10-27', '2022-10-27 00:00:00+00:00'], ['', '1.5', '', ''],
+                                                            ['a', '', '2022-10-27', '2022-10-27 00:00:00+00:00'], ['a', '1.5', '2022-10-27', '2022-10-27 00:00:00+00:00']]
+
+    def test_category_columns(self):
+        df = pd.DataFrame({
+            'category': pd.Series(['x', 'y', 'x']).astype('category'),
+            'category_na': pd.Series([1.5, None, 1.5]).astype('category'),
+        })
+
+        dataset_create_config = get_dataset_config(df)
+
+        assert dataset_create_config['tableSchemaList'][0]['columns'] == [{'name': 'category', 'dataType': 'Text'}, {'name': 'category_na', 'dataType': 'Text'}]
+        assert dataset_create_config['data'][0]['rows'] == [['x', '1.5'], ['y', ''], ['x', '1.5']]
+
+    def test_nullable_integer_column_with_na(self):
+        df = pd.DataFrame({'int': pd.Series([1, None, 1, 1], dtype='Int64')})
+
+        assert self.get_rows(df) == [['1'], [''], ['1'], ['1']]
+
+    def test_high_cardinality_nullable_columns_with_na(self):
+        df = pd.DataFrame({
+            'int': pd.array(list(range(1000)) + [None], dtype='Int64'),
+            'bool': pd.array([True, False] * 500 + [None], dtype='boolean'),
+            'float': pd.array([value / 2 for value in range(1000)] + [None], dtype='Float64'),
+        })
+
+        rows = self.get_rows(df)
+
+        assert rows[:2] == [['0', 'True', '0.0'], ['1', 'False', '0.5']]
+        assert rows[-1] == ['', '', '']
+        assert list(get_dataset_config(df, lazy=True)['data'][0]['rows']) == rows
+
+    def test_equal_values_of_different_types(self):
+        df = pd.DataFrame({'mixed': pd.Series([1, True, 1, True], dtype='object')})
+
+        assert self.get_rows(df) == [['1'], ['True'], ['1'], ['True']]
+
+    def test_negative_zeros(self):
+        df = pd.DataFrame({'number': [0.0, -0.0, 0.0, -0.0]})
+
+        assert self.get_rows(df) == [['0.0'], ['-0.0'], ['0.0'], ['-0.0']]
+
+
+class TestGetDatasetCreateConfigValueFormat:
+    def get_rows(self, df):
+        return get_dataset_config(df, value_format='compact')['data'][0]['rows']
+
+    def test_compact_floats(self):
+        df = pd.DataFrame({
+            'float64': [0.1 + 0.2, 2.0, 1e20, None],
+            'float32': pd.Series([0.1, 0.2, 1, 2], dtype='float32'),
+        })
+
+        assert self.get_rows(df) == [['0.3', '0.1'], ['2', '0.2'], ['1e+20', '1'], ['', '2']]
+
+    def test_compact_datetimes(self):
+        df = pd.DataFrame({
+            'date': pd.Series([pd.Timestamp('2022-10-27'), pd.Timestamp('2022-10-28'), pd.NaT]),
+            'datetime': pd.Series([pd.Timestamp('2022-10-27 10:50'), pd.Timestamp('2022-10-28'), pd.NaT]),
+            'datetime_ms': pd.Series([pd.Timestamp('2022-10-27 10:50:01.5'), pd.Timestamp('2022-10-28'), pd.NaT]),
+        })
+
+        dataset_create_config = get_dataset_config(df, value_format='compact')
+
+        assert dataset_create_config['tableSchemaList'][0]['columns'] == [{'name': 'date', 'dataType': 'DateTime'}, {'name': 'datetime', 'dataType': 'DateTime'},
+                                                                          {'name': 'datetime_ms', 'dataType': 'DateTime'}]
+        assert dataset_create_config['data'][0]['rows'] == [
+            ['2022-10-27', '2022-10-27T10:50:00', '2022-10-27T10:50:01.500'],
+            ['2022-10-28', '2022-10-28T00:00:00', '2022-10-28T00:00:00.000'],
+            ['', '', '']
+        ]
+
+    def test_compact_timezone_aware_datetimes(self):
+        df = pd.DataFrame({
+            'datetime_tz': pd.Series([pd.Timestamp('2022-10-27 10:50'), pd.Timestamp('2022-01-27 10:50'), pd.Timestamp('2022-10-28')]).dt.tz_localize('America/St_Johns'),
+        })
+
+        dataset_create_config = get_dataset_config(df, value_format='compact')
+
+        assert dataset_create_config['tableSchemaList'][0]['columns'] == [{'name': 'datetime_tz', 'dataType': 'DateTimeZone'}]
+        assert dataset_create_config['data'][0]['rows'] == [['2022-10-27T10:50:00-02:30'], ['2022-01-27T10:50:00-03:30'], ['2022-10-28T00:00:00-02:30']]
+
+    def test_compact_datetimes_out_of_nanoseconds_range(self):
+        df = pd.DataFrame({
+            'date': pd.Series(np.array(['9999-12-31', '1500-01-01', 'NaT'], dtype='datetime64[s]')),
+            'datetime_ms': pd.Series(np.array(['9999-12-31T23:59:59.5', '1500-01-01', 'NaT'], dtype='datetime64[ms]')),
+            'datetime_tz': pd.Series(np.array(['9999-12-31T10:50', '1500-01-01', 'NaT'], dtype='datetime64[s]')).dt.tz_localize('UTC'),
+        })
+
+        assert self.get_rows(df) == [
+            ['9999-12-31', '9999-12-31T23:59:59.500', '9999-12-31T10:50:00+00:00'],
+            ['1500-01-01', '1500-01-01T00:00:00.000', '1500-01-01T00:00:00+00:00'],
+            ['', '', '']
+        ]
+
+    def test_compact_low_cardinality_columns(self):
+        df = pd.DataFrame({'float': [0.1 + 0.2, 0.1 + 0.2, None, 0.1 + 0.2]})
+
+        assert self.get_rows(df) == [['0.3'], ['0.3'], [''], ['0.3']]
+
+    def test_compact_other_columns(self):
+        df = pd.DataFrame({'str': ['a', None], 'int': [1, 2], 'bool': [True, False]})
+
+        assert self.get_rows(df) == get_dataset_config(df)['data'][0]['rows']
+
+    def test_unsupported_value_format(self):
+        with raises(Exception, match="Unsupported value_format"):
+            get_dataset_config(pd.DataFrame({'a': [1]}), value_format='short')
+
+    def test_compact_with_arrow_engine(self):
+        with raises(Exception, match="Parameter value_format is supported only for pandas DataFrames"):
+            get_dataset_config(pd.DataFrame({'a': [1]}), engine='arrow', value_format='compact')
+
+
+class TestEstimateDatasetConfigSize:
+    def test_estimate_pandas_dataframe(self):
+        df = pd.DataFrame({'str': ['a', 'bb'] * 50, 'int': [1, 22] * 50})
+
+        estimation = estimate_dataset_config_size(df)
+
+        # Each value is quoted and followed by a separator, each row has its brackets
+        assert estimation['columns_bytes'] == {'str': 5.5, 'int': 5.5}
+        assert estimation['row_bytes'] == 13
+        assert estimation['rows_count'] == 100
+        assert estimation['estimated_bytes'] == len(json.dumps(get_dataset_config(df)['data'][0]['rows']))
+
+    def test_estimate_empty_dataframe(self):
+        estimation = estimate_dataset_config_size(pd.DataFrame({'str': []}))
+
+        assert estimation == {'rows_count': 0, 'row_bytes': 0, 'estimated_bytes': 0, 'columns_bytes': {'str': 0}}
+
+    def test_max_bytes_raise(self):
+        df = pd.DataFrame({'str': ['a', 'bb'] * 50})
+
+        with raises(Exception, match="The DataFrame estimated size of 750 bytes is bigger than max_bytes 500"):
+            get_dataset_config(df, max_bytes=500, max_bytes_action='raise')
+
+    def test_max_bytes_raise_within_budget(self):
+        df = pd.DataFrame({'str': ['a', 'bb'] * 50})
+
+        dataset_create_config = get_dataset_config(df, max_bytes=1000, max_bytes_action='raise')
+
+        assert dataset_create_config == get_dataset_config(df)
+
+    def test_unsupported_max_bytes_action(self):
+        with raises(Exception, match="Unsupported max_bytes_action"):
+            get_dataset_config(pd.DataFrame({'str': ['a']}), max_bytes=1000, max_bytes_action='ignore')
+
+
+class TestGetDatasetCreateConfigShaping:
+    DATA = {
+        'id': [f'id-{i:04d}' for i in range(200)],
+        'region': ['north', 'south'] * 100,
+        'description': ['a long description', 'short'] * 100,
+        'amount': [float(i) for i in range(200)],
+    }
+
+    def test_drop_high_cardinality_columns(self):
+        dataset_create_config = get_dataset_config(pd.DataFrame(self.DATA), high_cardinality_action='drop')
+
+        assert [col['name'] for col in dataset_create_config['tableSchemaList'][0]['columns']] == ['region', 'description', 'amount']
+        assert dataset_create_config['data'][0]['rows'][0] == ['north', 'a long description', '0.0']
+
+        shaping = dataset_create_config['metadata']['shaping']
+        assert shaping['dropped_columns'] == ['id']
+        assert shaping['hashed_columns'] == []
+        assert shaping['estimated_bytes_after'] < shaping['estimated_bytes_before']
+
+    def test_hash_high_cardinality_columns(self):
+        df = pd.DataFrame(self.DATA)
+        df.loc[1, 'id'] = None
+
+        dataset_create_config = get_dataset_config(df, high_cardinality_action='hash')
+        rows = dataset_create_config['data'][0]['rows']
+
+        assert dataset_create_config['metadata']['shaping']['hashed_columns'] == ['id']
+        assert re.fullmatch('[0-9a-f]{16}', rows[0][0])
+        assert rows[1][0] == ''
+        assert len(set(row[0] for row in rows)) == 200
+
+    def test_small_dataframe_not_pruned(self):
+        dataset_create_config = get_dataset_config(pd.DataFrame(self.DATA).head(10), high_cardinality_action='drop')
+
+        assert dataset_create_config['metadata']['shaping']['dropped_columns'] == []
+        assert len(dataset_create_config['tableSchemaList'][0]['columns']) == 4
+
+    def test_truncate_long_text(self):
+        dataset_create_config = get_dataset_config(pd.DataFrame(self.DATA), max_text_length=10)
+
+        assert dataset_create_config['metadata']['shaping']['truncated_columns'] == ['description']
+        assert dataset_create_config['data'][0]['rows'][:2] == [['id-0000', 'north', 'a long des', '0.0'], ['id-0001', 'south', 'short', '1.0']]
+
+    def test_non_string_column_labels(self):
+        df = pd.DataFrame({0: self.DATA['id'], 1: self.DATA['description']})
+
+        dataset_create_config = get_dataset_config(df, high_cardinality_action='hash', max_text_length=10)
+        rows = dataset_create_config['data'][0]['rows']
+
+        assert dataset_create_config['metadata']['shaping']['hashed_columns'] == [0]
+        assert dataset_create_config['metadata']['shaping']['truncated_columns'] == [1]
+        assert re.fullmatch('[0-9a-f]{16}', rows[0][0])
+        assert [row[1] for row in rows[:2]] == ['a long des', 'short']
+
+    def test_shaping_before_aggregation(self):
+        dataset_create_config = get_dataset_config(pd.DataFrame(self.DATA), high_cardinality_action='drop', reduce='aggregate')
+
+        assert dataset_create_config['data'][0]['rows'] == [['north', 'a long description', '9900.0'], ['south', 'short', '10000.0']]
+
+    def test_invalid_shaping_parameters(self):
+        df = pd.DataFrame(self.DATA)
+
+        with raises(Exception, match="Unsupported high_cardinality_action"):
+            get_dataset_config(df, high_cardinality_action='remove')
+
+        with raises(Exception, match="Parameter max_text_length should be at least 1"):
+            get_dataset_config(df, max_text_length=0)
+
+
+class TestGetDatasetCreateConfigProjection:
+    DATA = {'region': ['north', 'south', 'east'], 'amount': [1, 2, 3], 'year': [2023, 2024, 2024]}
+
+    def test_columns(self):
+        dataset_create_config = get_dataset_config(pd.DataFrame(self.DATA), columns=['amount', 'region'])
+
+        assert dataset_create_config['tableSchemaList'][0]['columns'] == [{'name': 'amount', 'dataType': 'Number'}, {'name': 'region', 'dataType': 'Text'}]
+        assert dataset_create_config['data'][0]['rows'] == [['1', 'north'], ['2', 'south'], ['3', 'east']]
+
+    def test_where_expression_on_unselected_column(self):
+        dataset_create_config = get_dataset_config(pd.DataFrame(self.DATA), columns=['region'], where='year == 2024')
+
+        assert dataset_create_config['data'][0]['rows'] == [['south'], ['east']]
+
+    def test_where_mask(self):
+        df = pd.DataFrame(self.DATA)
+        dataset_create_config = get_dataset_config(df, where=df['amount'] > 2)
+
+        assert dataset_create_config['data'][0]['rows'] == [['east', '3', '2024']]
+
+    def test_projection_before_cache(self):
+        dataset_config_cache.clear()
+        df = pd.DataFrame(self.DATA)
+
+        north_dataset_create_config = get_dataset_config(df, where="region == 'north'", use_cache=True)
+        south_dataset_create_config = get_dataset_config(df, where="region == 'south'", use_cache=True)
+
+        assert north_dataset_create_config['data'][0]['rows'] == [['north', '1', '2023']]
+        assert south_dataset_create_config['data'][0]['rows'] == [['south', '2', '2024']]
+
+    def test_missing_columns(self):
+        with raises(Exception, match="Columns \\['country'\\] are not found in the DataFrame"):
+            get_dataset_config(pd.DataFrame(self.DATA), columns=['region', 'country'])
+
+    def test_multiple_tables(self):
+        with raises(Exception, match="Parameters columns and where are not supported for multiple tables"):
+            get_dataset_config({'Sales': pd.DataFrame(self.DATA)}, columns=['region'])
+
+
+class TestGetDatasetCreateConfigLazy:
+    DATA = {
+        'region': ['north', 'south', None, 'east', 'west'],
+        'amount': [1.5, 2.0, 3.25, 4.0, 5.0],
+        'active': [True, False, True, True, False],
+        'date': pd.to_datetime(['2022-10-27', '2022-10-28', '2022-10-29', '2022-10-30', '2022-10-31 10:50:01.5'], format='ISO8601')
+    }
+
+    def test_lazy_rows(self):
+        df = pd.DataFrame(self.DATA)
+        dataset_create_config = get_dataset_config(df, lazy=True)
+        rows = dataset_create_config['data'][0]['rows']
+
+        assert isinstance(rows, LazyRows)
+        assert len(rows) == 5
+        assert dataset_create_config['tableSchemaList'] == get_dataset_config(df)['tableSchemaList']
+        assert list(rows) == get_dataset_config(df)['data'][0]['rows']
+
+    @pytest.mark.parametrize('value_format', ['default', 'compact'])
+    def test_chunks_format_datetimes_with_column_precision(self, value_format):
+        df = pd.DataFrame(self.DATA)
+        rows = get_dataset_config(df, value_format=value_format, lazy=True)['data'][0]['rows']
+
+        chunks = list(rows.iter_chunks(chunk_rows_count=2))
+
+        assert [len(chunk_rows) for chunk_rows in chunks] == [2, 2, 1]
+        assert [row for chunk_rows in chunks for row in chunk_rows] == get_dataset_config(df, value_format=value_format)['data'][0]['rows']
+
+    @pytest.mark.parametrize('value_format', ['default', 'compact'])
+    def test_datetimes_out_of_nanoseconds_range(self, value_format):
+        df = pd.DataFrame({'date': pd.Series(np.array(['9999-12-31', '2022-10-27', 'NaT'], dtype='datetime64[s]'))})
+        rows = get_dataset_config(df, value_format=value_format, lazy=True)['data'][0]['rows']
+
+        assert list(rows) == get_dataset_config(df, value_format=value_format)['data'][0]['rows'] == [['9999-12-31'], ['2022-10-27'], ['']]
+        assert [row for chunk_rows in rows.iter_chunks(chunk_rows_count=2) for row in chunk_rows] == list(rows)
+
+    def test_json_chunks(self):
+        rows = get_dataset_config(pd.DataFrame(self.DATA), lazy=True)['data'][0]['rows']
+
+        json_chunks = list(rows.iter_json_chunks(chunk_rows_count=3))
+
+        assert len(json_chunks) == 2
+        assert [row for json_chunk in json_chunks for row in json.loads(json_chunk)] == list(rows)
+
+    def test_json_columns_chunks(self):
+        rows = get_dataset_config(pd.DataFrame(self.DATA), lazy=True)['data'][0]['rows']
+
+        json_chunks = list(rows.iter_json_chunks(chunk_rows_count=3, wire_format='columns'))
+
+        assert [list(row) for json_chunk in json_chunks for row in zip(*json.loads(json_chunk))] == list(rows)
+
+    def test_estimate_bytes(self):
+        rows = get_dataset_config(pd.DataFrame(self.DATA), lazy=True)['data'][0]['rows']
+
+        assert rows.estimate_bytes() == len(json.dumps(list(rows), ensure_ascii=False).encode('utf-8'))
+
+    def test_strict_validation_skips_lazy_rows(self):
+        assert is_dataset_create_config_valid(get_dataset_config(pd.DataFrame(self.DATA), lazy=True), strict=True)
+
+    def test_unsupported_engine(self):
+        with raises(Exception, match="Parameter lazy is supported only for pandas DataFrames with the 'default' engine"):
+            get_dataset_config(pd.DataFrame(self.DATA), engine='arrow', lazy=True)
+
+    def test_previous_dataset_config_with_lazy_rows(self):
+        df = pd.DataFrame(self.DATA)
+        previous_dataset_config = get_dataset_config(df, lazy=True)
+
+        with raises(Exception, match="Parameter previous_dataset_config with lazy rows is not supported"):
+            get_dataset_config(df, previous_dataset_config=previous_dataset_config)
+
+
+class TestInstrumentConversion:
+    DATA = {'region': ['north', 'south', None], 'amount': [1.5, 2.0, 3.25], 'active': [True, False, True]}
+
+    def test_pandas_stages(self):
+        with instrument_conversion() as instrumentation:
+            get_dataset_config(pd.DataFrame(self.DATA))
+
+        report = instrumentation.report()
+        stages = {stage['stage']: stage for stage in report['stages']}
+
+        assert report['stages'][0]['stage'] == 'convert'
+        assert {'data_type', 'factorize', 'lowercase_booleans', 'fillna', 'astype', 'tolist', 'columns_to_rows'} <= set(stages)
+        assert stages['convert']['calls'] == 1
+        assert stages['convert']['rows_count'] == 3
+        assert stages['data_type']['calls'] == 3
+        assert stages['lowercase_booleans']['rows_count'] == 3
+        assert stages['lowercase_booleans']['bytes'] == 3
+        assert all(stage['seconds'] >= 0 and stage['peak_bytes'] >= 0 for stage in report['stages'])
+        assert report['peak_bytes'] >= stages['convert']['peak_bytes']
+
+    def test_without_trace_memory(self):
+        with instrument_conversion(trace_memory=False) as instrumentation:
+            get_dataset_config(pd.DataFrame(self.DATA))
+
+        report = instrumentation.report()
+
+        assert report['peak_bytes'] is None
+        assert all(stage['peak_bytes'] is None for stage in report['stages'])
+
+    def test_stages_recorded_only_in_block(self):
+        df = pd.DataFrame(self.DATA)
+
+        with instrument_conversion() as instrumentation:
+            get_dataset_config(df, max_rows=2)
+
+        get_dataset_config(df)
+
+        stages = {stage['stage']: stage for stage in instrumentation.report()['stages']}
+        assert stages['sample']['rows_count'] == 3
+        assert stages['convert']['calls'] == 1
+        assert stages['convert']['rows_count'] == 2
+
+    def test_nested_instrumentation(self):
+        with instrument_conversion():
+            with raises(Exception, match="Conversion instrumentation is already active"):
+                with instrument_conversion():
+                    pass
+
+
+class TestGetDatasetCreateConfigArrowEngine:
+    def test_happy_path_get_dataset_config(self):
+        pytest.importorskip('pyarrow')
+        df = pd.DataFrame({
+            'str': pd.Series(['a', None], dtype='str'),
+            'bool': pd.Series([True, False], dtype='bool'),
+            'int': pd.Series([1, 2], dtype='int32'),
+            'number': pd.Series([1.2, None], dtype='float'),
+            'datetime': pd.date_range("2022-10-27 10:50", periods=2, freq="H"),
+            'datetimezone': pd.date_range("2022-10-27 10:50", periods=2, freq="H", tz="US/Pacific"),
+            'mix': [1, 'a']
+        })
+        dataset_create_config = get_dataset_config(df, engine='arrow')
+        assert is_dataset_create_config_valid(dataset_create_config)
+
+        # validate columns types
+        columns_types = [col['dataType']
+                         for col in dataset_create_config['tableSchemaList'][0]['columns']]
+        expected_column_types = ['Text', 'Logical', 'Int32',
+                                 'Number', 'DateTime', 'DateTimeZone', 'Text']
+        assert columns_types == expected_column_types
+
+        # validate data rows
+        rows = dataset_create_config['data'][0]['rows']
+        expected_rows = [
+            ['a', 'true', '1', '1.2', "2022-10-27 10:50:00",
+                "2022-10-27 10:50:00-07:00", '1'],
+            ['', 'false', '2', '', "2022-10-27 11:50:00",
+                "2022-10-27 11:50:00-07:00", 'a']
+        ]
+        assert rows == expected_rows
+
+    def test_sub_second_datetime(self):
+        pytest.importorskip('pyarrow')
+        df = pd.DataFrame({'datetime': [pd.Timestamp('2022-10-27 10:50:00.5'), pd.Timestamp('2022-10-27 10:50:00')]})
+        dataset_create_config = get_dataset_config(df, engine='arrow')
+
+        rows = dataset_create_config['data'][0]['rows']
+        assert rows == [['2022-10-27 10:50:00.500'], ['2022-10-27 10:50:00.000']]
+
+    def test_timezone_offsets_as_default_engine(self):
+        pytest.importorskip('pyarrow')
+        df = pd.DataFrame({
+            'utc': pd.Series([pd.Timestamp('2020-01-01'), pd.NaT]).dt.tz_localize('UTC'),
+            'paris': pd.Series([pd.Timestamp('2020-01-01'), pd.Timestamp('2020-01-01 10:50:00.5')]).dt.tz_localize('Europe/Paris'),
+            'kolkata': pd.Series([pd.Timestamp('2020-01-01'), pd.Timestamp('2020-01-02')]).dt.tz_localize('Asia/Kolkata'),
+        })
+        dataset_create_config = get_dataset_config(df, engine='arrow')
+
+        assert dataset_create_config['data'][0]['rows'] == [
+            ['2020-01-01 00:00:00+00:00', '2020-01-01 00:00:00.000+01:00', '2020-01-01 00:00:00+05:30'],
+            ['', '2020-01-01 10:50:00.500+01:00', '2020-01-02 00:00:00+05:30']
+        ]
+
+    def test_durations(self):
+        pytest.importorskip('pyarrow')
+        dataset_create_config = get_dataset_config(pd.DataFrame({'duration': pd.to_timedelta(['1 days 02:00:00', None])}), engine='arrow')
+
+        assert dataset_create_config['data'][0]['rows'] == [['1 days 02:00:00'], ['']]
+
+    def test_unsupported_types_converted_as_text(self):
+        pytest.importorskip('pyarrow')
+        df = pd.DataFrame({
+            'period': pd.Series(pd.period_range('2022-01', periods=2, freq='M')),
+            'interval': pd.Series(pd.interval_range(0, 2)),
+            'complex': [1 + 2j, 3j],
+        })
+        dataset_create_config = get_dataset_config(df, engine='arrow')
+
+        assert [col['dataType'] for col in dataset_create_config['tableSchemaList'][0]['columns']] == ['Text', 'Text', 'Text']
+        assert dataset_create_config['data'][0]['rows'] == [['2022-01', '(0, 1]', '(1+2j)'], ['2022-02', '(1, 2]', '3j']]
+
+
+class TestGetDatasetCreateConfigSpark:
+    DATA = [
+        ('a', True, 1, 1.5, datetime.datetime(2022, 10, 27, 10, 50)),
+        (None, False, 2, None, None),
+    ]
+    SCHEMA = 'str string, bool boolean, int bigint, number double, datetime timestamp'
+    EXPECTED_COLUMNS = [
+        {'name': 'str', 'dataType': 'Text'},
+        {'name': 'bool', 'dataType': 'Logical'},
+        {'name': 'int', 'dataType': 'Int32'},
+        {'name': 'number', 'dataType': 'Number'},
+        {'name': 'datetime', 'dataType': 'DateTime'}
+    ]
+    EXPECTED_ROWS = [['a', 'true', '1', '1.5', '2022-10-27 10:50:00'], ['', 'false', '2', '', '']]
+    SALES_DATA = [('a', 1.5), ('b', 2.0), ('a', 3.0), (None, None)]
+    SALES_SCHEMA = 'region string, sales double'
+
+    def assert_dataset_config(self, dataset_create_config):
+        assert is_dataset_create_config_valid(dataset_create_config)
+
+        assert dataset_create_config['tableSchemaList'][0]['columns'] == self.EXPECTED_COLUMNS
+        assert dataset_create_config['data'][0]['rows'] == self.EXPECTED_ROWS
+
+    def test_happy_path_get_dataset_config(self, spark):
+        pytest.importorskip('pyarrow')
+
+        self.assert_dataset_config(get_dataset_config(spark.createDataFrame(self.DATA, self.SCHEMA)))
+
+    def test_collect_without_pyarrow(self, spark, monkeypatch):
+        monkeypatch.setattr('powerbiclient.utils.pa', None)
+
+        self.assert_dataset_config(get_dataset_config(spark.createDataFrame(self.DATA, self.SCHEMA)))
+
+    def test_collect_with_incompatible_pyarrow(self, spark, monkeypatch):
+        pytest.importorskip('pyarrow')
+        from pyspark.sql import DataFrame
+
+        def collect_as_arrow(*args, **kwargs):
+            raise ImportError("PyArrow >= 4.0.0 must be installed")
+
+        monkeypatch.setattr(DataFrame, 'toArrow', collect_as_arrow, raising=False)
+        monkeypatch.setattr(DataFrame, '_collect_as_arrow', collect_as_arrow)
+
+        self.assert_dataset_config(get_dataset_config(spark.createDataFrame(self.DATA, self.SCHEMA)))
+
+    def test_streaming(self, spark):
+        progress = []
+        df = spark.createDataFrame(self.DATA, self.SCHEMA).coalesce(1).union(spark.createDataFrame(self.DATA, self.SCHEMA).coalesce(1))
+
+        dataset_create_config = get_dataset_config(df, streaming=True, progress_callback=progress.append)
+
+        assert dataset_create_config['data'][0]['rows'] == self.EXPECTED_ROWS * 2
+        assert [(item['partitions_done'], item['partitions_count'], item['rows_count']) for item in progress] == [(1, 2, 2), (2, 2, 4)]
+
+    def test_streaming_max_driver_memory(self, spark):
+        with raises(Exception, match="Collected rows exceed max_driver_memory of 1 bytes after 1 out of 1 partitions"):
+            get_dataset_config(spark.createDataFrame(self.DATA, self.SCHEMA).coalesce(1), streaming=True, max_driver_memory=1)
+
+    def test_aggregate_sum(self, spark):
+        dataset_create_config = get_dataset_config(spark.createDataFrame(self.SALES_DATA, self.SALES_SCHEMA), reduce='aggregate')
+
+        assert sorted(dataset_create_config['data'][0]['rows']) == [['', ''], ['a', '4.5'], ['b', '2.0']]
+        assert dataset_create_config['metadata']['aggregation']['group_by_columns'] == ['region']
+
+    def test_max_rows(self, spark):
+        df = spark.range(100).withColumnRenamed('id', 'value')
+
+        dataset_create_config = get_dataset_config(df, max_rows=10)
+
+        assert 0 < len(dataset_create_config['data'][0]['rows']) <= 10
+        assert dataset_create_config['metadata']['sampling']['rows_count'] == 100
+
+    def test_projection(self, spark):
+        df = spark.createDataFrame(self.SALES_DATA, self.SALES_SCHEMA)
+
+        dataset_create_config = get_dataset_config(df, columns=['sales'], where="region = 'a'")
+
+        assert dataset_create_config['tableSchemaList'][0]['columns'] == [{'name': 'sales', 'dataType': 'Number'}]
+        assert dataset_create_config['data'][0]['rows'] == [['1.5'], ['3.0']]
+
+    def test_shaping(self, spark):
+        df = spark.createDataFrame([(f'id-{i:04d}', 'a long description') for i in range(200)], 'id string, description string')
+
+        dataset_create_config = get_dataset_config(df, high_cardinality_action='hash', max_text_length=10)
+        rows = dataset_create_config['data'][0]['rows']
+
+        assert dataset_create_config['metadata']['shaping']['hashed_columns'] == ['id']
+        assert dataset_create_config['metadata']['shaping']['truncated_columns'] == ['description']
+        assert re.fullmatch('[0-9a-f]{16}', rows[0][0])
+        assert rows[0][1] == 'a long des'
+
+
+class TestGetDatasetCreateConfigStreaming:
+    def test_streaming_pandas_df(self):
+        with pytest.raises(Exception):
+            get_dataset_config(pd.DataFrame([1, 2, 3]), streaming=True)
+
+    def test_max_driver_memory_without_streaming(self):
+        with pytest.raises(Exception):
+            get_dataset_config(pd.DataFrame([1, 2, 3]), max_driver_memory=1024)
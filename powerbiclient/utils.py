@@ -4,12 +4,33 @@
 # Copyright (c) Microsoft Corporation.
 # Licensed under the MIT license.
 
-from pandas.api.types import is_numeric_dtype
-from pyspark.sql.functions import col
+from pandas.api.types import infer_dtype, is_datetime64_any_dtype, is_extension_array_dtype, is_float_dtype, is_numeric_dtype, is_timedelta64_dtype
+from pyspark.sql.functions import approx_count_distinct, coalesce, col, count, hex as spark_hex, length, lit, lower, lpad, max as spark_max, substring, sum as spark_sum, when, xxhash64
 from pyspark.sql.types import NumericType
+from collections import OrderedDict
+from collections.abc import Iterator
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from contextlib import contextmanager
+from itertools import chain
+import hashlib
+import json
+import numpy as np
+import os
 import pandas as pd
 import pyspark
 import re
+import sys
+import threading
+import time
+import tracemalloc
+
+try:
+    import pyarrow as pa
+    import pyarrow.compute as pc
+    import pyarrow.dataset as ds
+    from pyarrow.fs import LocalFileSystem
+except ImportError:
+    pa = None
 
 from .authentication import DeviceCodeLoginAuthentication, AuthenticationResult
 from .models import DataType
@@ -33,39 +54,692 @@ data_types_map_spark = {
     'object': DataType.TEXT.value  # default
 }
 
-def get_dataset_config(df, locale='en-US'):
+duckdb_numeric_type_ids = [
+    'tinyint', 'smallint', 'bigint', 'hugeint', 'utinyint', 'usmallint', 'uinteger', 'ubigint', 'uhugeint',
+    'float', 'double', 'decimal'
+]
+
+SUPPORTED_ENGINES = ['default', 'arrow']
+SUPPORTED_REDUCTIONS = ['aggregate']
+SUPPORTED_AGGREGATIONS = ['sum', 'count']
+SUPPORTED_COLUMN_POOLS = ['process', 'thread']
+SUPPORTED_VALUE_FORMATS = ['default', 'compact']
+SUPPORTED_MAX_BYTES_ACTIONS = ['sample', 'raise']
+SUPPORTED_HIGH_CARDINALITY_ACTIONS = ['drop', 'hash']
+SUPPORTED_WIRE_FORMATS = ['rows', 'columns', 'dictionary']
+
+# Text columns with at least this ratio of distinct values, in DataFrames with at least this number of rows, are considered identifiers
+HIGH_CARDINALITY_RATIO = 0.95
+HIGH_CARDINALITY_MIN_ROWS = 100
+
+# Datetime units tried from the coarsest to format datetimes with the compact value format, with their length in nanoseconds
+DATETIME_UNITS = [('D', 86400 * 10 ** 9), ('s', 10 ** 9), ('ms', 10 ** 6), ('us', 10 ** 3), ('ns', 1)]
+
+# Minimum number of cells of a DataFrame for its columns to be converted in parallel, smaller DataFrames are converted faster serially
+PARALLEL_MIN_CELLS = 1000000
+
+# Number of rows converted to estimate the payload size of a row
+ESTIMATE_SAMPLE_ROWS = 1000
+
+# Columns whose first rows have at most this ratio of distinct values are formatted once per distinct value
+FACTORIZE_SAMPLE_ROWS = 10000
+FACTORIZE_MAX_DISTINCT_RATIO = 0.5
+
+# Text columns with at most this ratio of distinct values are sent as their distinct values and the codes of the values with the 'dictionary' wire format
+DICTIONARY_MAX_DISTINCT_RATIO = 0.5
+
+# Unsigned integer types of the dictionary codes, the smallest one fitting the number of distinct values is used
+DICTIONARY_CODES_TYPES = ['uint8', 'uint16', 'uint32']
+
+# Approximate JSON size in bytes of each chunk of lazy rows sent to the frontend
+LAZY_ROWS_CHUNK_BYTES = 4 * 1024 ** 2
+
+# Optional dataset create configuration key describing how the DataFrame was transformed, it is not sent to Power BI
+METADATA_KEY = 'metadata'
+
+# Default maximum number of dataset create configurations kept in the cache
+DEFAULT_CACHE_MAX_SIZE = 8
+
+# File extensions supported by get_dataset_config_from_path and their pyarrow dataset formats
+SUPPORTED_FILE_FORMATS = {
+    '.parquet': 'parquet',
+    '.pq': 'parquet',
+    '.csv': 'csv'
+}
+
+class DatasetConfigCache:
+    """ Least recently used cache of dataset create configurations, keyed by DataFrame content fingerprints """
+
+    def __init__(self, max_size=DEFAULT_CACHE_MAX_SIZE):
+        """ Create an instance of DatasetConfigCache
+
+        Args:
+            max_size (int): Optional.
+                Maximum number of cached dataset create configurations, the least recently used one is evicted when it is exceeded
+        """
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self._max_size = max_size
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    @property
+    def max_size(self):
+        return self._max_size
+
+    @max_size.setter
+    def max_size(self, max_size):
+        if max_size < 0:
+            raise Exception("Cache max_size cannot be negative")
+
+        with self._lock:
+            self._max_size = max_size
+            self._evict()
+
+    def get(self, key):
+        """ Returns the cached dataset create configuration of the given key, or None if it is not cached """
+        with self._lock:
+            if key not in self._entries:
+                self.misses += 1
+                return None
+
+            self.hits += 1
+            self._entries.move_to_end(key)
+            return self._entries[key]
+
+    def put(self, key, dataset_create_config):
+        """ Cache the dataset create configuration of the given key """
+        with self._lock:
+            self._entries[key] = dataset_create_config
+            self._entries.move_to_end(key)
+            self._evict()
+
+    def clear(self):
+        """ Remove all cached dataset create configurations and reset the statistics """
+        with self._lock:
+            self._entries.clear()
+            self.hits = 0
+            self.misses = 0
+            self.evictions = 0
+
+    def stats(self):
+        """ Returns the cache statistics
+
+        Returns:
+            dict: 'hits', 'misses', 'evictions', 'size' and 'max_size' of the cache
+        """
+        with self._lock:
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'size': len(self._entries),
+                'max_size': self._max_size
+            }
+
+    def _evict(self):
+        while len(self._entries) > self._max_size:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+# Global level dataset create configurations cache, used by get_dataset_config with use_cache=True
+dataset_config_cache = DatasetConfigCache()
+
+class ConversionInstrumentation:
+    """ Records the wall time, traced memory peak, and rows and bytes counts of each stage of the DataFrames conversion """
+
+    def __init__(self, trace_memory=True):
+        """ Create an instance of ConversionInstrumentation
+
+        Args:
+            trace_memory (bool): Optional.
+                Record the memory peak of each stage using tracemalloc, which is started for the instrumented block if it is not tracing
+        """
+        self.trace_memory = trace_memory
+        self._stages = OrderedDict()
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self._started_tracing = False
+        self._root_frame = None
+        self._start_time = None
+        self._seconds = None
+        self._peak_bytes = None
+
+    def report(self):
+        """ Returns the report of the recorded stages
+
+        Returns:
+            dict: report with the keys:
+                - 'seconds' - Wall time of the instrumented block
+                - 'peak_bytes' - Traced memory peak of the instrumented block above the memory traced when it started, None if memory is not traced
+                - 'stages' - List of the stages in the order they first started, each a dict with the keys:
+                    'stage' (name), 'calls', 'seconds' (sum of the calls), 'peak_bytes' (maximum of the calls), 'rows_count' and 'bytes' (sums of the calls).
+                    'bytes' is the shallow memory size of the stage input, or the size of the collected data for Spark stages.
+                    Stages nest, e.g. the 'convert' stage includes the stages of the conversion of each column
+        """
+        with self._lock:
+            stages = [dict(stage) for stage in self._stages.values()]
+
+        return {
+            'seconds': self._seconds if self._seconds is not None else time.perf_counter() - self._start_time,
+            'peak_bytes': self._peak_bytes,
+            'stages': stages
+        }
+
+    def _start(self):
+        if self.trace_memory and not tracemalloc.is_tracing():
+            tracemalloc.start()
+            self._started_tracing = True
+
+        self._root_frame = self._enter_frame()
+        self._start_time = time.perf_counter()
+
+    def _stop(self):
+        self._seconds = time.perf_counter() - self._start_time
+        self._peak_bytes = self._exit_frame(self._root_frame)
+
+        if self._started_tracing:
+            tracemalloc.stop()
+
+    def _enter_frame(self):
+        # Each frame keeps the traced memory when it started and the highest peak of its nested frames,
+        # since the peak is reset when a nested frame starts
+        frames = self._get_frames()
+        frame = {'start_bytes': None, 'peak_bytes': 0}
+
+        if self.trace_memory and tracemalloc.is_tracing():
+            current_bytes, peak_bytes = tracemalloc.get_traced_memory()
+            if frames:
+                frames[-1]['peak_bytes'] = max(frames[-1]['peak_bytes'], peak_bytes)
+
+            # tracemalloc.reset_peak is available starting from Python 3.9, the peaks of earlier versions include the preceding stages
+            if hasattr(tracemalloc, 'reset_peak'):
+                tracemalloc.reset_peak()
+
+            frame['start_bytes'] = current_bytes
+
+        frames.append(frame)
+        return frame
+
+    def _exit_frame(self, frame):
+        frames = self._get_frames()
+        frames.pop()
+
+        if frame['start_bytes'] is None or not tracemalloc.is_tracing():
+            return None
+
+        peak_bytes = max(tracemalloc.get_traced_memory()[1], frame['peak_bytes'])
+        if frames:
+            frames[-1]['peak_bytes'] = max(frames[-1]['peak_bytes'], peak_bytes)
+
+        return peak_bytes - frame['start_bytes']
+
+    def _get_frames(self):
+        if not hasattr(self._local, 'frames'):
+            self._local.frames = []
+
+        return self._local.frames
+
+    @contextmanager
+    def _stage(self, name, counts):
+        with self._lock:
+            # Stages are reported in the order they first started
+            self._stages.setdefault(name, {'stage': name, 'calls': 0, 'seconds': 0, 'peak_bytes': None, 'rows_count': 0, 'bytes': 0})
+
+        frame = self._enter_frame()
+        start_time = time.perf_counter()
+
+        try:
+            yield counts
+        finally:
+            seconds = time.perf_counter() - start_time
+            peak_bytes = self._exit_frame(frame)
+            self._record(name, seconds, peak_bytes, counts)
+
+    def _record(self, name, seconds, peak_bytes, counts):
+        with self._lock:
+            stage = self._stages[name]
+            stage['calls'] += 1
+            stage['seconds'] += seconds
+            stage['rows_count'] += counts['rows_count'] or 0
+            stage['bytes'] += counts['bytes'] or 0
+
+            if peak_bytes is not None:
+                stage['peak_bytes'] = max(stage['peak_bytes'] or 0, peak_bytes)
+
+# Instrumentation of the active instrument_conversion block, conversion stages are recorded only when it is set
+active_conversion_instrumentation = None
+
+@contextmanager
+def instrument_conversion(trace_memory=True):
+    """ Context manager recording the wall time, traced memory peak, and rows and bytes counts of each stage of the conversions run in its block,
+    e.g. fillna, astype, tolist and columns_to_rows for pandas DataFrames or collect for Spark DataFrames
+
+    Args:
+        trace_memory (bool): Optional.
+            Record the memory peak of each stage using tracemalloc, which slows the conversion down.
+            The memory peaks of the tables of a dict converted concurrently include the allocations of each other
+
+    Returns:
+        ConversionInstrumentation: instrumentation whose report() method returns the recorded stages
+    """
+    global active_conversion_instrumentation
+
+    if active_conversion_instrumentation is not None:
+        raise Exception("Conversion instrumentation is already active")
+
+    instrumentation = ConversionInstrumentation(trace_memory)
+    active_conversion_instrumentation = instrumentation
+    instrumentation._start()
+
+    try:
+        yield instrumentation
+    finally:
+        instrumentation._stop()
+        active_conversion_instrumentation = None
+
+@contextmanager
+def conversion_stage(name, data=None):
+    # Yields the counts of the stage, which are set from its input data and can be updated with its output
+    counts = {'rows_count': None, 'bytes': None}
+    instrumentation = active_conversion_instrumentation
+
+    if instrumentation is None:
+        yield counts
+        return
+
+    if isinstance(data, (pd.Series, pd.DataFrame)):
+        counts['rows_count'] = len(data.index)
+        counts['bytes'] = int(np.sum(data.memory_usage(index=False)))
+    elif isinstance(data, np.ndarray):
+        counts['rows_count'] = len(data)
+        counts['bytes'] = data.nbytes
+
+    with instrumentation._stage(name, counts):
+        yield counts
+
+class LazyRows:
+    """ Rows of a pandas DataFrame which are converted one chunk at a time when they are iterated or sent to the frontend """
+
+    def __init__(self, df, data_types, value_format='default'):
+        """ Create an instance of LazyRows
+
+        Args:
+            df (object): Required.
+                Pandas DataFrame instance, it should not be modified while the rows are used
+            data_types (list): Required.
+                Data type of each column of the DataFrame
+            value_format (string): Optional.
+                The formatting of the values, as in get_dataset_config
+        """
+        self._df = df
+        self._data_types = data_types
+        self._value_format = value_format
+
+        # Datetimes formatted with the precision of the values of their column are formatted with the precision of all the column,
+        # so every chunk formats them the same way. Timezone aware datetimes are formatted one by one by pandas
+        self._datetime_units = {position: get_datetime_unit(series) for position, (_, series) in enumerate(df.items())
+                                if is_datetime64_any_dtype(series.dtype) and (value_format == 'compact' or series.dt.tz is None)}
+
+    def __len__(self):
+        return len(self._df.index)
+
+    def __iter__(self):
+        for chunk_rows in self.iter_chunks():
+            yield from chunk_rows
+
+    def iter_chunks(self, chunk_rows_count=None):
+        """ Yields the rows converted one chunk at a time
+
+        Args:
+            chunk_rows_count (int): Optional.
+                Number of rows of each chunk, defaults to the number of rows of about LAZY_ROWS_CHUNK_BYTES bytes
+        """
+        for columns_values, rows_count in self._iter_columns_chunks(chunk_rows_count):
+            yield columns_to_rows(columns_values, rows_count)
+
+    def iter_json_chunks(self, chunk_rows_count=None, wire_format='rows'):
+        """ Yields the rows converted and encoded one chunk at a time, each chunk as UTF-8 JSON bytes
+
+        Args:
+            chunk_rows_count (int): Optional.
+                Number of rows of each chunk, defaults to the number of rows of about LAZY_ROWS_CHUNK_BYTES bytes
+            wire_format (string): Optional.
+                'rows' to encode each chunk as a JSON list of rows, 'columns' as a JSON list of the values of each column,
+                or 'dictionary' as 'columns' with the text columns of the chunk dictionary encoded
+        """
+        for columns_values, rows_count in self._iter_columns_chunks(chunk_rows_count):
+            # The values of the columns are encoded as they are converted, without creating a list per row
+            if wire_format == 'dictionary':
+                chunk = dictionary_encode_columns_values(columns_values, self._data_types, binary_codes=False)
+            elif wire_format == 'columns':
+                chunk = columns_values
+            else:
+                chunk = columns_to_rows(columns_values, rows_count)
+
+            yield json.dumps(chunk, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+
+    def estimate_bytes(self, sample_rows=ESTIMATE_SAMPLE_ROWS):
+        """ Returns the estimated JSON size in bytes of the rows, from evenly spaced converted rows """
+        if not len(self):
+            return 0
+
+        positions = np.unique(np.linspace(0, len(self) - 1, num=min(sample_rows, len(self)), dtype=int))
+        sampled_rows = columns_to_rows(self._convert_columns(self._df.take(positions)), len(positions))
+
+        return round(len(json.dumps(sampled_rows, ensure_ascii=False).encode('utf-8')) / len(sampled_rows) * len(self))
+
+    def _iter_columns_chunks(self, chunk_rows_count=None):
+        if chunk_rows_count is None:
+            row_bytes = self.estimate_bytes() / len(self) if len(self) else 0
+            chunk_rows_count = max(1, int(LAZY_ROWS_CHUNK_BYTES // row_bytes)) if row_bytes else 1
+
+        for start in range(0, len(self), chunk_rows_count):
+            chunk = self._df.iloc[start:start + chunk_rows_count]
+            yield self._convert_columns(chunk), len(chunk.index)
+
+    def _convert_rows(self, start=0):
+        chunk = self._df.iloc[start:]
+        return columns_to_rows(self._convert_columns(chunk), len(chunk.index))
+
+    def _convert_columns(self, df):
+        return [pandas_format_datetimes(series, self._datetime_units[position], 'T' if self._value_format == 'compact' else ' ')
+                if position in self._datetime_units else pandas_get_column_values(series, data_type, self._value_format)
+                for position, ((_, series), data_type) in enumerate(zip(df.items(), self._data_types))]
+
+def get_dataset_config(df, locale='en-US', engine='default', streaming=False, max_driver_memory=None, progress_callback=None,
+                       reduce=None, aggregation='sum', max_rows=None, max_bytes=None, sample_seed=0, stratify_by=None,
+                       use_cache=False, previous_dataset_config=None, max_workers=None, column_workers=None, column_pool='process',
+                       value_format='default', max_bytes_action='sample', high_cardinality_action=None, max_text_length=None,
+                       columns=None, where=None, lazy=False):
     """ Utility method to get the dataset create configuration dict from a pandas. To be used as input for instantiating a quick visualization object.
 
     Args:
         df (object): Required.
-            Pandas DataFrame instance
+            Pandas DataFrame instance, or a dict of table names to DataFrame instances to create a dataset with multiple tables,
+            or an iterator of pandas DataFrame chunks (e.g. pd.read_csv(..., chunksize=...)) converted one chunk at a time.
+            Spark DataFrames, polars DataFrames and LazyFrames, DuckDB relations, pyarrow Tables and Dask DataFrames are supported as well.
+            Dask DataFrame partitions are converted on the Dask workers, where powerbiclient should be installed
         locale (string): Optional.
             This value is used to evaluate the data and parse values of the given DataFrame. 
             Supported locales can be found here: https://learn.microsoft.com/en-us/openspecs/windows_protocols/ms-lcid/a9eac961-e77d-41a6-90a5-ce1a8b0cdb9c?redirectedfrom=MSDN
+        engine (string): Optional.
+            The conversion engine, one of:
+                - 'default' - Convert the DataFrame using pandas or Spark
+                - 'arrow' - Convert the DataFrame into an Apache Arrow table and use Arrow compute kernels to cast its values. Requires pyarrow
+        streaming (bool): Optional.
+            Collect a Spark DataFrame one partition at a time instead of collecting it at once. Supported only for Spark DataFrames with the 'default' engine
+        max_driver_memory (int): Optional.
+            Used with streaming. Maximum approximate size in bytes of the collected rows in the driver memory, an exception is raised when it is exceeded
+        progress_callback (function): Optional.
+            Used with streaming. Invoked after each collected partition with a dict containing 'partitions_done', 'partitions_count', 'rows_count' and 'driver_memory'
+        reduce (string): Optional.
+            Reduce the rows of the DataFrame before converting it:
+                - 'aggregate' - Group by the non-numeric columns and aggregate the numeric columns
+            The applied reduction is described in the 'metadata' key of the returned dict
+        aggregation (string): Optional.
+            Used with reduce='aggregate'. The aggregation applied on the numeric columns, 'sum' or 'count'
+        max_rows (int): Optional.
+            Maximum number of rows, the DataFrame is sampled when it has more rows
+        max_bytes (int): Optional.
+            Maximum estimated JSON size in bytes of the rows, the DataFrame is sampled when its estimated size is bigger
+            The applied sampling is described in the 'metadata' key of the returned dict
+        max_bytes_action (string): Optional.
+            Used with max_bytes. The action taken when the estimated size of the DataFrame is bigger than max_bytes, before converting it:
+                - 'sample' - Sample the DataFrame to fit max_bytes
+                - 'raise' - Raise an exception
+        high_cardinality_action (string): Optional.
+            The action taken on text columns whose values are almost all distinct (e.g. identifiers or GUIDs), one of:
+                - 'drop' - Drop the columns
+                - 'hash' - Replace the values with their 16 hexadecimal characters hash
+            The shaped columns are described in the 'metadata' key of the returned dict
+        max_text_length (int): Optional.
+            Maximum number of characters of the values of text columns, longer values are truncated.
+            The truncated columns are described in the 'metadata' key of the returned dict
+        columns (list): Optional.
+            Names of the columns to keep, for pandas and Spark DataFrames
+        where (object): Optional.
+            Rows filter applied before the columns are selected, for pandas and Spark DataFrames:
+                - pandas - A DataFrame.query expression string or a boolean mask
+                - Spark - A SQL expression string or a boolean Column
+            Spark DataFrames are filtered and projected before any cast or collection, so Spark prunes the partitions and columns of the source
+        sample_seed (int): Optional.
+            Used with max_rows or max_bytes. Seed of the random sampling, the same seed returns the same sample
+        stratify_by (string): Optional.
+            Used with max_rows or max_bytes. Name of a column to sample each of its values proportionally instead of sampling uniformly
+        use_cache (bool): Optional.
+            Return the cached dataset create configuration when the same DataFrame content was already converted with the same parameters.
+            pandas DataFrames are identified by their hashed values, Spark DataFrames by their logical plan and input files.
+            The cache is available as powerbiclient.utils.dataset_config_cache, returned configurations share their rows with the cache and should not be modified.
+            The cache is not used with previous_dataset_config
+        previous_dataset_config (dict): Optional.
+            The dataset create configuration returned for an earlier version of a pandas DataFrame that has only been appended to since.
+            Only the appended rows are converted and added to the previous rows, the DataFrame is fully converted if its schema,
+            the formatting of its values (e.g. integers promoted to floats) or the precision of its datetime columns has changed
+        max_workers (int): Optional.
+            Used when df is a dict. Maximum number of tables converted concurrently, defaults to the ThreadPoolExecutor default
+        column_workers (int): Optional.
+            Convert the columns of a pandas DataFrame in parallel using this number of workers, each converting a group of columns.
+            DataFrames with less than 1,000,000 cells are converted serially
+        column_pool (string): Optional.
+            Used with column_workers. The pool of workers, 'process' to use multiple cores or 'thread'
+        value_format (string): Optional.
+            The formatting of the values of a pandas DataFrame, one of:
+                - 'default' - Format the values using pandas string conversion
+                - 'compact' - Format floats with the significant digits of their dtype (15 for float64), and datetimes in ISO 8601
+                  with the coarsest unit keeping all values (e.g. 2022-10-27T10:50:00) followed by their UTC offset for timezone aware datetimes
+        lazy (bool): Optional.
+            Return the rows of a pandas DataFrame as a LazyRows instance, which converts them one chunk at a time when they are iterated.
+            QuickVisualize sends each converted chunk as a binary JSON buffer, so the rows are never all converted in memory.
+            The DataFrame should not be modified until the dataset create configuration is used
 
     Returns:
         dict: dataset_create_config
     """
     if df is None:
         raise Exception("Parameter df is required")
-    elif len(df.columns) != len(set(df.columns)):
+    elif isinstance(df, dict):
+        if not df:
+            raise Exception("Parameter df should contain at least one table")
+        elif not all(isinstance(table_name, str) and table_name for table_name in df):
+            raise Exception("Table names should be non-empty strings")
+        elif previous_dataset_config is not None:
+            raise Exception("Parameter previous_dataset_config is not supported for multiple tables")
+        elif columns is not None or where is not None:
+            raise Exception("Parameters columns and where are not supported for multiple tables")
+
+        table_options = {
+            'locale': locale,
+            'engine': engine,
+            'streaming': streaming,
+            'max_driver_memory': max_driver_memory,
+            'progress_callback': progress_callback,
+            'reduce': reduce,
+            'aggregation': aggregation,
+            'max_rows': max_rows,
+            'max_bytes': max_bytes,
+            'max_bytes_action': max_bytes_action,
+            'high_cardinality_action': high_cardinality_action,
+            'max_text_length': max_text_length,
+            'sample_seed': sample_seed,
+            'stratify_by': stratify_by,
+            'use_cache': use_cache,
+            'column_workers': column_workers,
+            'column_pool': column_pool,
+            'value_format': value_format,
+            'lazy': lazy
+        }
+
+        # Convert the tables concurrently, Spark jobs and Arrow kernels do not hold the GIL
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            futures = {table_name: executor.submit(get_dataset_config, table_df, **table_options) for table_name, table_df in df.items()}
+            return merge_dataset_configs({table_name: future.result() for table_name, future in futures.items()}, locale)
+    elif isinstance(df, Iterator):
+        if (engine != 'default' or streaming or reduce is not None or max_rows is not None or max_bytes is not None
+                or use_cache or previous_dataset_config is not None or value_format != 'default'
+                or high_cardinality_action is not None or max_text_length is not None or columns is not None or where is not None or lazy):
+            raise Exception("DataFrame chunks support only the locale parameter")
+
+        with conversion_stage('convert') as stage:
+            columns_schema, rows = pandas_chunks_get_data_and_schema(df)
+            stage['rows_count'] = len(rows)
+
+        return create_dataset_config(columns_schema, rows, locale)
+
+    if columns is not None or where is not None:
+        with conversion_stage('project', df):
+            df = project_dataframe(df, columns, where)
+
+    if len(get_dataframe_column_names(df)) != len(set(get_dataframe_column_names(df))):
         raise Exception("Duplicate column names found in the DataFrame")
+    elif engine not in SUPPORTED_ENGINES:
+        raise Exception(f"Unsupported engine '{engine}', supported engines are: {SUPPORTED_ENGINES}")
+    elif (max_driver_memory is not None or progress_callback is not None) and not streaming:
+        raise Exception("Parameters max_driver_memory and progress_callback are supported only with streaming")
+    elif streaming and (engine != 'default' or not isinstance(df, pyspark.sql.dataframe.DataFrame)):
+        raise Exception("Streaming is supported only for Spark DataFrames with the 'default' engine")
+    elif reduce is not None and reduce not in SUPPORTED_REDUCTIONS:
+        raise Exception(f"Unsupported reduce '{reduce}', supported reductions are: {SUPPORTED_REDUCTIONS}")
+    elif aggregation not in SUPPORTED_AGGREGATIONS:
+        raise Exception(f"Unsupported aggregation '{aggregation}', supported aggregations are: {SUPPORTED_AGGREGATIONS}")
+    elif (max_rows is not None and max_rows < 0) or (max_bytes is not None and max_bytes < 0):
+        raise Exception("Parameters max_rows and max_bytes cannot be negative")
+    elif max_bytes_action not in SUPPORTED_MAX_BYTES_ACTIONS:
+        raise Exception(f"Unsupported max_bytes_action '{max_bytes_action}', supported actions are: {SUPPORTED_MAX_BYTES_ACTIONS}")
+    elif high_cardinality_action is not None and high_cardinality_action not in SUPPORTED_HIGH_CARDINALITY_ACTIONS:
+        raise Exception(f"Unsupported high_cardinality_action '{high_cardinality_action}', supported actions are: {SUPPORTED_HIGH_CARDINALITY_ACTIONS}")
+    elif max_text_length is not None and max_text_length < 1:
+        raise Exception("Parameter max_text_length should be at least 1")
+    elif stratify_by is not None and stratify_by not in get_dataframe_column_names(df):
+        raise Exception(f"Column '{stratify_by}' given in stratify_by is not found in the DataFrame")
+    elif previous_dataset_config is not None and not isinstance(df, pd.DataFrame):
+        raise Exception("Parameter previous_dataset_config is supported only for pandas DataFrames")
+    elif previous_dataset_config is not None and (reduce is not None or max_rows is not None or max_bytes is not None):
+        raise Exception("Parameter previous_dataset_config cannot be used with reduce, max_rows or max_bytes")
+    elif previous_dataset_config is not None and not is_dataset_create_config_valid(previous_dataset_config):
+        raise Exception("Parameter previous_dataset_config is not a valid dataset create configuration")
+    elif column_workers is not None and column_workers < 1:
+        raise Exception("Parameter column_workers should be at least 1")
+    elif column_pool not in SUPPORTED_COLUMN_POOLS:
+        raise Exception(f"Unsupported column_pool '{column_pool}', supported pools are: {SUPPORTED_COLUMN_POOLS}")
+    elif value_format not in SUPPORTED_VALUE_FORMATS:
+        raise Exception(f"Unsupported value_format '{value_format}', supported value formats are: {SUPPORTED_VALUE_FORMATS}")
+    elif value_format != 'default' and (engine != 'default' or not isinstance(df, pd.DataFrame)):
+        raise Exception("Parameter value_format is supported only for pandas DataFrames with the 'default' engine")
+    elif lazy and (engine != 'default' or not isinstance(df, pd.DataFrame)):
+        raise Exception("Parameter lazy is supported only for pandas DataFrames with the 'default' engine")
+    elif lazy and (previous_dataset_config is not None or column_workers is not None):
+        raise Exception("Parameter lazy cannot be used with previous_dataset_config or column_workers")
+    elif previous_dataset_config is not None and any(isinstance(table['rows'], LazyRows) for table in previous_dataset_config['data']):
+        raise Exception("Parameter previous_dataset_config with lazy rows is not supported")
+
+    cache_key = None
+    # The rows appended to a previous dataset create configuration depend on its rows, which are not part of the cache key
+    if use_cache and previous_dataset_config is None:
+        fingerprint = get_dataframe_fingerprint(df)
+        if fingerprint is not None:
+            cache_key = (fingerprint, locale, engine, reduce, aggregation, max_rows, max_bytes, max_bytes_action, sample_seed, stratify_by, value_format,
+                         high_cardinality_action, max_text_length, lazy)
+            dataset_create_config = dataset_config_cache.get(cache_key)
+            if dataset_create_config is not None:
+                return dict(dataset_create_config)
 
-    table_name = 'Table'
     columns_schema = []
     rows = []
+    metadata = {}
 
-    # NA values should be considered as empty strings
-    df = df.fillna('')
+    # Identifiers are dropped before aggregating, so they do not make each row its own group
+    if high_cardinality_action is not None or max_text_length is not None:
+        with conversion_stage('shape', df):
+            df, metadata['shaping'] = shape_dataframe(df, high_cardinality_action, max_text_length)
 
-    if isinstance(df, pd.DataFrame):
-        columns_schema, rows = pandas_get_data_and_schema(df)
-    elif isinstance(df, pyspark.sql.dataframe.DataFrame):
-        columns_schema, rows = pyspark_get_data_and_schema(df)
-    else:
-        raise Exception("Unsupported DataFrame type")
+    if reduce == 'aggregate':
+        with conversion_stage('aggregate', df):
+            df, metadata['aggregation'] = aggregate_dataframe(df, aggregation)
 
-    return {
+    if max_bytes is not None and max_bytes_action == 'raise':
+        # Fail before converting the DataFrame
+        with conversion_stage('estimate', df):
+            estimated_bytes = estimate_dataset_config_size(df)['estimated_bytes']
+        if estimated_bytes > max_bytes:
+            raise Exception(f"The DataFrame estimated size of {estimated_bytes} bytes is bigger than max_bytes {max_bytes}, "
+                            "reduce it using the reduce or max_rows parameters")
+
+        max_bytes = None
+
+    if max_rows is not None or max_bytes is not None:
+        with conversion_stage('sample', df):
+            df, metadata['sampling'] = sample_dataframe(df, max_rows, max_bytes, sample_seed, stratify_by)
+
+    with conversion_stage('convert', df) as stage:
+        if previous_dataset_config is not None:
+            columns_schema, rows, metadata['incremental'] = append_dataframe_rows(df, previous_dataset_config, engine, value_format)
+        elif lazy:
+            columns_schema, rows = pandas_get_lazy_data_and_schema(df, value_format)
+        else:
+            columns_schema, rows = dataframe_get_data_and_schema(df, engine, streaming, max_driver_memory, progress_callback,
+                                                                 column_workers, column_pool, value_format)
+
+        stage['rows_count'] = len(rows)
+
+    if 'sampling' in metadata:
+        metadata['sampling']['sampled_rows_count'] = len(rows)
+
+    dataset_create_config = create_dataset_config(columns_schema, rows, locale, metadata)
+
+    if cache_key is not None:
+        dataset_config_cache.put(cache_key, dict(dataset_create_config))
+
+    return dataset_create_config
+
+def get_dataset_config_from_path(path, columns=None, filter=None, locale='en-US', file_format=None):
+    """ Utility method to get the dataset create configuration dict from Parquet or CSV files, without loading them into a pandas DataFrame. Requires pyarrow.
+
+    Args:
+        path (string): Required.
+            Path of a local Parquet or CSV file, or of a directory of files. Hive partitioned directories (e.g. year=2024/) are supported
+        columns (list): Optional.
+            Names of the columns to read, only these columns are read from the files
+        filter (pyarrow.compute.Expression): Optional.
+            Rows filter applied while scanning the files, e.g. pyarrow.compute.field('year') == 2024.
+            Parquet row groups and partitions whose statistics do not match the filter are skipped
+        locale (string): Optional.
+            This value is used to evaluate the data and parse values of the files
+        file_format (string): Optional.
+            'parquet' or 'csv', inferred from the file extension by default. Directories default to 'parquet'
+
+    Returns:
+        dict: dataset_create_config
+    """
+    if pa is None:
+        raise Exception("pyarrow is required to read files, install it using 'pip install pyarrow'")
+
+    path = os.path.abspath(os.fspath(path))
+    if not os.path.exists(path):
+        raise Exception(f"Path '{path}' is not found")
+
+    if file_format is None:
+        file_format = SUPPORTED_FILE_FORMATS.get(os.path.splitext(path)[1].lower(), 'parquet' if os.path.isdir(path) else None)
+
+    if file_format not in SUPPORTED_FILE_FORMATS.values():
+        raise Exception(f"Unsupported file format of '{path}', supported formats are: {sorted(set(SUPPORTED_FILE_FORMATS.values()))}")
+
+    # Memory map the files so reading the projected columns does not copy whole files into memory
+    dataset = ds.dataset(path, format=file_format, partitioning='hive', filesystem=LocalFileSystem(use_mmap=True))
+
+    missing_columns = [col_name for col_name in (columns or []) if col_name not in dataset.schema.names]
+    if missing_columns:
+        raise Exception(f"Columns {missing_columns} are not found in '{path}'")
+
+    # The projection and the filter are pushed down to the scan
+    table = dataset.to_table(columns=columns, filter=filter)
+
+    return get_dataset_config(table, locale=locale)
+
+def create_dataset_config(columns_schema, rows, locale='en-US', metadata=None):
+    table_name = 'Table'
+    dataset_create_config = {
         'locale': locale,
         'tableSchemaList': [
             {
@@ -81,55 +755,1040 @@ def get_dataset_config(df, locale='en-US'):
         ]
     }
 
-def pyspark_get_data_and_schema(df):
+    if metadata:
+        dataset_create_config[METADATA_KEY] = metadata
+
+    return dataset_create_config
+
+def merge_dataset_configs(table_dataset_configs, locale='en-US'):
+    dataset_create_config = {
+        'locale': locale,
+        'tableSchemaList': [],
+        'data': []
+    }
+    metadata = {}
+
+    for table_name, table_dataset_config in table_dataset_configs.items():
+        dataset_create_config['tableSchemaList'].append({
+            'name': table_name,
+            'columns': table_dataset_config['tableSchemaList'][0]['columns']
+        })
+        dataset_create_config['data'].append({
+            'name': table_name,
+            'rows': table_dataset_config['data'][0]['rows']
+        })
+
+        if METADATA_KEY in table_dataset_config:
+            metadata[table_name] = table_dataset_config[METADATA_KEY]
+
+    if metadata:
+        dataset_create_config[METADATA_KEY] = {'tables': metadata}
+
+    return dataset_create_config
+
+def dataframe_get_data_and_schema(df, engine='default', streaming=False, max_driver_memory=None, progress_callback=None,
+                                  column_workers=None, column_pool='process', value_format='default'):
+    if engine == 'arrow':
+        with conversion_stage('to_arrow') as stage:
+            table = dataframe_to_arrow_table(df)
+            stage['rows_count'], stage['bytes'] = table.num_rows, table.nbytes
+
+        return arrow_get_data_and_schema(table)
+    elif isinstance(df, pd.DataFrame):
+        return pandas_get_data_and_schema(df, column_workers, column_pool, value_format)
+    elif isinstance(df, pyspark.sql.dataframe.DataFrame):
+        return pyspark_get_data_and_schema(df, streaming, max_driver_memory, progress_callback)
+    elif is_arrow_table(df):
+        return arrow_get_data_and_schema(df)
+    elif is_polars_dataframe(df):
+        return polars_get_data_and_schema(df)
+    elif is_duckdb_relation(df):
+        return duckdb_get_data_and_schema(df)
+    elif is_dask_dataframe(df):
+        return dask_get_data_and_schema(df)
+    else:
+        raise Exception("Unsupported DataFrame type")
+
+def get_dataframe_column_names(df):
+    if is_arrow_table(df):
+        return df.column_names
+    elif is_polars_dataframe(df):
+        return df.lazy().collect_schema().names()
+
+    return list(df.columns)
+
+# polars and DuckDB are imported by the caller whenever one of their DataFrames is given, so they are not imported here
+def is_polars_dataframe(df):
+    polars = sys.modules.get('polars')
+    return polars is not None and isinstance(df, (polars.DataFrame, polars.LazyFrame))
+
+def is_duckdb_relation(df):
+    duckdb = sys.modules.get('duckdb')
+    return duckdb is not None and isinstance(df, duckdb.DuckDBPyRelation)
+
+def is_dask_dataframe(df):
+    dask_dataframe = sys.modules.get('dask.dataframe')
+    return dask_dataframe is not None and isinstance(df, dask_dataframe.DataFrame)
+
+def is_arrow_table(df):
+    return pa is not None and isinstance(df, pa.Table)
+
+def append_dataframe_rows(df, previous_dataset_config, engine='default', value_format='default'):
+    previous_columns_schema = previous_dataset_config['tableSchemaList'][0]['columns']
+    previous_rows = previous_dataset_config['data'][0]['rows']
+    previous_rows_count = len(previous_rows)
+    # The dtypes of the previous conversion are known when it was an incremental conversion as well
+    previous_dtypes = previous_dataset_config.get(METADATA_KEY, {}).get('incremental', {}).get('dtypes')
+
+    metadata = {
+        'previous_rows_count': previous_rows_count,
+        'appended_rows_count': 0,
+        'rebuilt': False,
+        'dtypes': [str(dtype) for dtype in df.dtypes]
+    }
+
+    if engine == 'default':
+        df = pandas_infer_objects(df)
+
+    if (len(df.index) >= previous_rows_count and previous_dtypes in (None, metadata['dtypes'])
+            and not pandas_datetime_units_changed(df, previous_rows_count)):
+        # Convert the rows appended after the previous rows along with the last previous row,
+        # which is converted differently when the formatting of a column has changed (e.g. integers promoted to floats)
+        start = max(previous_rows_count - 1, 0)
+        columns_schema, rows = dataframe_get_data_and_schema_from(df, start, engine, value_format)
+        overlapping_rows_count = previous_rows_count - start
+
+        if columns_schema == previous_columns_schema and rows[:overlapping_rows_count] == previous_rows[start:]:
+            metadata['appended_rows_count'] = len(rows) - overlapping_rows_count
+
+            # A new list is created so the previous dataset create configuration (which may be cached) is not modified
+            return columns_schema, previous_rows + rows[overlapping_rows_count:], metadata
+
+    # The DataFrame has shrunk or its schema has changed, convert all of its rows
+    columns_schema, rows = dataframe_get_data_and_schema(df, engine, value_format=value_format)
+    metadata['rebuilt'] = True
+
+    return columns_schema, rows, metadata
+
+def dataframe_get_data_and_schema_from(df, start, engine='default', value_format='default'):
+    if engine != 'default':
+        return dataframe_get_data_and_schema(df.iloc[start:], engine, value_format=value_format)
+
+    # The data types and the datetimes precision are computed from all the rows, e.g. a NA value in the previous rows makes a text column
+    columns_schema, lazy_rows = pandas_get_lazy_data_and_schema(df, value_format)
+    return columns_schema, lazy_rows._convert_rows(start)
+
+def pandas_datetime_units_changed(df, previous_rows_count):
+    # Datetime values are formatted with the precision of their whole column (e.g. dates only when all times are midnight),
+    # so the previous rows are formatted differently when the appended rows change it
+    return any(get_datetime_unit(series.iloc[:previous_rows_count]) != get_datetime_unit(series)
+               for _, series in df.items() if is_datetime64_any_dtype(series.dtype))
+
+def pyspark_get_data_and_schema(df, streaming=False, max_driver_memory=None, progress_callback=None):
     columns_schema = []
 
     for col_name, dtype_key in df.dtypes:
-        # Find the correct DataType according to Spark dtype
-        if dtype_key in data_types_map_spark:
-            data_type = data_types_map_spark[dtype_key]
-        elif isinstance(df.schema[col_name].dataType, NumericType):
-            data_type = DataType.NUMBER.value
+        columns_schema.append({'name': col_name, 'dataType': pyspark_get_data_type(df, col_name, dtype_key)})
+
+    # Cast all dataframe values as string in a single projection, NA values should be considered as empty strings
+    string_df = df.select([coalesce(col(col_name).cast("string"), lit('')).alias(col_name) for col_name in df.columns])
+
+    if streaming:
+        return columns_schema, pyspark_stream_rows(string_df, max_driver_memory, progress_callback)
+
+    return columns_schema, pyspark_collect_rows(string_df)
+
+def pyspark_get_data_type(df, col_name, dtype_key):
+    # Find the correct DataType according to Spark dtype
+    if dtype_key in data_types_map_spark:
+        return data_types_map_spark[dtype_key]
+    elif isinstance(df.schema[col_name].dataType, NumericType):
+        return DataType.NUMBER.value
+    else:
+        return DataType.TEXT.value
+
+def pyspark_collect_rows(string_df):
+    with conversion_stage('collect') as stage:
+        batches = pyspark_collect_arrow_batches(string_df)
+
+        if batches is None:
+            rows = string_df.rdd.map(list).collect()
+            stage['rows_count'] = len(rows)
+            return rows
+
+        stage['rows_count'] = sum(batch.num_rows for batch in batches)
+        stage['bytes'] = sum(batch.nbytes for batch in batches)
+
+    rows = []
+    for batch in batches:
+        with conversion_stage('tolist') as stage:
+            columns_values = [column.to_numpy(zero_copy_only=False).tolist() for column in batch.columns]
+            stage['rows_count'], stage['bytes'] = batch.num_rows, batch.nbytes
+
+        rows.extend(columns_to_rows(columns_values, batch.num_rows))
+
+    return rows
+
+def pyspark_collect_arrow_batches(string_df):
+    if pa is None:
+        return None
+
+    # Collect the values as Arrow record batches instead of pickling every Row through the RDD
+    try:
+        if hasattr(string_df, 'toArrow'):
+            return string_df.toArrow().to_batches()
+
+        return string_df._collect_as_arrow()
+    except ImportError:
+        # Spark requires a minimum pyarrow version, the values are collected through the RDD with older versions
+        return None
+
+def pyspark_stream_rows(string_df, max_driver_memory=None, progress_callback=None):
+    def partition_to_rows(iterator):
+        rows = [list(row) for row in iterator]
+
+        # Approximate size of the rows in the driver memory, computed on the executors
+        memory = sum(sys.getsizeof(row) + sum(sys.getsizeof(value) for value in row) for row in rows)
+        return [(rows, memory)]
+
+    rdd = string_df.rdd
+    partitions_count = rdd.getNumPartitions()
+    rows = []
+    driver_memory = 0
+
+    # Run a job per partition, so only a single partition is transferred to the driver at any given moment
+    for partition_index in range(partitions_count):
+        with conversion_stage('collect') as stage:
+            [(partition_rows, partition_memory)] = rdd.context.runJob(rdd, partition_to_rows, [partition_index])
+            stage['rows_count'], stage['bytes'] = len(partition_rows), partition_memory
+
+        driver_memory += partition_memory
+        if max_driver_memory is not None and driver_memory > max_driver_memory:
+            raise Exception(f"Collected rows exceed max_driver_memory of {max_driver_memory} bytes after {partition_index + 1} out of {partitions_count} partitions")
+
+        rows.extend(partition_rows)
+
+        if progress_callback:
+            progress_callback({
+                'partitions_done': partition_index + 1,
+                'partitions_count': partitions_count,
+                'rows_count': len(rows),
+                'driver_memory': driver_memory
+            })
+
+    return rows
+
+def pandas_get_data_and_schema(df, column_workers=None, column_pool='process', value_format='default'):
+    if column_workers is not None and column_workers > 1 and len(df.columns) > 1 and df.size >= PARALLEL_MIN_CELLS:
+        columns_data_and_types = pandas_convert_columns_in_parallel(df, column_workers, column_pool, value_format)
+    else:
+        columns_data_and_types = pandas_convert_columns(df, value_format)
+
+    columns_schema = [{'name': col_name, 'dataType': data_type} for col_name, (data_type, _) in zip(df.columns, columns_data_and_types)]
+    columns_values = [values for _, values in columns_data_and_types]
+
+    return columns_schema, columns_to_rows(columns_values, len(df.index))
+
+def dictionary_encode_columns_values(columns_values, data_types, binary_codes=True):
+    # Text columns with repeated values are replaced by their distinct values and the code of each value,
+    # as little endian binary buffers to be sent as widget buffers or as lists to be encoded in JSON
+    encoded_columns_values = []
+
+    for column_values, data_type in zip(columns_values, data_types):
+        codes, uniques = pd.factorize(np.asarray(column_values, dtype=object)) if data_type == DataType.TEXT.value else (None, None)
+
+        if codes is None or len(uniques) > len(column_values) * DICTIONARY_MAX_DISTINCT_RATIO:
+            encoded_columns_values.append(column_values)
+            continue
+
+        codes_type = next(codes_type for codes_type in DICTIONARY_CODES_TYPES if len(uniques) <= np.iinfo(codes_type).max + 1)
+        codes = codes.astype(np.dtype(codes_type).newbyteorder('<'))
+
+        encoded_columns_values.append({
+            'dictionary': uniques.tolist(),
+            'codesType': codes_type,
+            'codes': memoryview(codes) if binary_codes else codes.tolist()
+        })
+
+    return encoded_columns_values
+
+def pandas_get_lazy_data_and_schema(df, value_format='default'):
+    # Only the data types are computed from all the rows, the values are converted when the rows are iterated
+    df = pandas_infer_objects(df)
+    columns_schema = [{'name': col_name, 'dataType': pandas_get_filled_data_type(series)} for col_name, series in df.items()]
+
+    return columns_schema, LazyRows(df, [column_schema['dataType'] for column_schema in columns_schema], value_format)
+
+def pandas_convert_columns(df, value_format='default'):
+    # Convert the DataFrame one column at a time, so only a single column is copied at any given moment
+    return [pandas_get_column_data_and_type(series, value_format) for _, series in df.items()]
+
+def pandas_convert_columns_in_parallel(df, column_workers, column_pool, value_format='default'):
+    # Each worker converts a contiguous group of columns, so the converted groups are concatenated in the columns order
+    columns_groups = np.array_split(np.arange(len(df.columns)), min(column_workers, len(df.columns)))
+    executor_class = ProcessPoolExecutor if column_pool == 'process' else ThreadPoolExecutor
+
+    with executor_class(max_workers=len(columns_groups)) as executor:
+        groups_data_and_types = executor.map(pandas_convert_columns, [df.iloc[:, group] for group in columns_groups], [value_format] * len(columns_groups))
+        return [column_data_and_type for group_data_and_types in groups_data_and_types for column_data_and_type in group_data_and_types]
+
+def pandas_chunks_get_data_and_schema(chunks):
+    columns_schema = None
+    data_types = None
+    rows = []
+
+    # Only a single chunk is kept in memory, besides the converted rows
+    for chunk in chunks:
+        if not isinstance(chunk, pd.DataFrame):
+            raise Exception("DataFrame chunks should be pandas DataFrames")
+
+        if columns_schema is None:
+            # The schema is inferred from the first chunk
+            if len(chunk.columns) != len(set(chunk.columns)):
+                raise Exception("Duplicate column names found in the DataFrame")
+
+            columns_schema = [{'name': col_name, 'dataType': pandas_get_data_type(series)} for col_name, series in chunk.items()]
+            data_types = [column_schema['dataType'] for column_schema in columns_schema]
         else:
-            data_type = DataType.TEXT.value
+            pandas_validate_chunk_schema(chunk, columns_schema)
 
-        columns_schema.append({'name': col_name, 'dataType': data_type})
+        rows.extend(pandas_partition_to_rows(chunk, data_types))
+
+    if columns_schema is None:
+        raise Exception("No DataFrame chunks found")
+
+    return columns_schema, rows
+
+def pandas_validate_chunk_schema(chunk, columns_schema):
+    if list(chunk.columns) != [column_schema['name'] for column_schema in columns_schema]:
+        raise Exception(f"DataFrame chunk columns {list(chunk.columns)} do not match the columns of the first chunk")
+
+    for column_schema, (col_name, series) in zip(columns_schema, chunk.items()):
+        data_type = pandas_get_data_type(series)
+
+        # A column with only missing values in a chunk is read as float, it is compatible with any type
+        if data_type != column_schema['dataType'] and not series.isna().all():
+            raise Exception(f"Column {col_name} has type {data_type} in a DataFrame chunk but {column_schema['dataType']} in the first chunk, "
+                            "specify the column dtypes when reading the chunks")
+
+def pandas_get_column_data_and_type(series, value_format='default'):
+    with conversion_stage('data_type', series):
+        series = pandas_infer_object_column(series)
+        data_type = pandas_get_filled_data_type(series)
+
+    return data_type, pandas_get_column_values(series, data_type, value_format)
+
+def pandas_infer_objects(df):
+    inferred_columns = [pandas_infer_object_column(series) for _, series in df.items()]
+    if all(inferred_series.dtype == series.dtype for inferred_series, (_, series) in zip(inferred_columns, df.items())):
+        return df
+
+    return pd.concat(inferred_columns, axis=1)
+
+def pandas_infer_object_column(series):
+    # Object columns without NA values take the dtype of their values (e.g. booleans are a logical column),
+    # as pandas infers it when filling the NA values of a DataFrame
+    if series.dtype == object and not series.hasnans:
+        return series.infer_objects()
+
+    return series
+
+def pandas_get_filled_data_type(series):
+    # NA values should be considered as empty strings, which makes the column a text column,
+    # unless the dtype keeps its missing values when filled with empty strings (e.g. NaT of datetime columns)
+    if series.hasnans and not (is_datetime64_any_dtype(series.dtype) or is_timedelta64_dtype(series.dtype)
+                               or isinstance(series.dtype, (pd.PeriodDtype, pd.StringDtype))):
+        return DataType.TEXT.value
+
+    return pandas_get_data_type(series)
+
+def pandas_get_column_values(series, data_type, value_format='default'):
+    # Logical values should be with lower case: true / false
+    if data_type == DataType.LOGICAL.value and series.dtype == bool:
+        with conversion_stage('lowercase_booleans', series):
+            return np.where(series.to_numpy(), 'true', 'false').tolist()
+
+    with conversion_stage('factorize', series):
+        codes_and_uniques = pandas_factorize_column(series)
+
+    if codes_and_uniques is not None:
+        codes, uniques = codes_and_uniques
+
+        # Format each distinct value once, the NA code -1 takes the appended empty string
+        uniques_values = np.array(pandas_format_values(pd.Series(uniques), value_format) + [''], dtype=object)
+
+        with conversion_stage('tolist', codes):
+            return uniques_values[codes].tolist()
+
+    return pandas_format_values(series, value_format)
+
+def pandas_format_values(series, value_format='default'):
+    if value_format == 'compact' and is_float_dtype(series.dtype):
+        with conversion_stage('format_floats', series):
+            return pandas_format_floats(series)
+    elif value_format == 'compact' and is_datetime64_any_dtype(series.dtype):
+        with conversion_stage('format_datetimes', series):
+            return pandas_format_datetimes(series)
+
+    # NA values should be considered as empty strings
+    if series.hasnans:
+        with conversion_stage('fillna', series):
+            # Nullable dtypes (e.g. Int64) cannot hold empty strings, so they are filled as objects
+            series = series.astype(object).fillna('') if is_extension_array_dtype(series.dtype) else series.fillna('')
+
+    with conversion_stage('astype', series):
+        values = series.astype('string')
 
-    # Cast all dataframe values as string
-    string_df = df.select([col(col_name).cast("string") for col_name in df.columns])
+    # Datetime columns keep their NaT values when filled with empty strings
+    if values.hasnans:
+        with conversion_stage('fillna', values):
+            values = values.fillna('')
 
-    return columns_schema, string_df.rdd.map(list).collect()
+    with conversion_stage('tolist', values):
+        return values.tolist()
 
-def pandas_get_data_and_schema(df):
+def pandas_format_floats(series):
+    # Format with the significant digits of the dtype, so 0.1 + 0.2 is formatted as 0.3
+    precision = np.finfo(getattr(series.dtype, 'numpy_dtype', series.dtype)).precision
+    float_values = series.to_numpy(dtype='float64', na_value=np.nan)
+
+    values = np.array(list(map(f'{{:.{precision}g}}'.format, float_values.tolist())), dtype=object)
+    values[np.isnan(float_values)] = ''
+    return values.tolist()
+
+def pandas_format_datetimes(series, unit=None, separator='T'):
+    datetimes = pd.DatetimeIndex(series)
+    offsets = None
+
+    if datetimes.tz is not None:
+        # Format the local date and time followed by its offset from UTC in minutes
+        utc_datetimes = datetimes.tz_convert(None)
+        datetimes = datetimes.tz_localize(None)
+        minute_values = 60 * 10 ** 9 // dict(DATETIME_UNITS)[np.datetime_data(datetimes.dtype)[0]]
+        offsets = (datetimes.asi8 - utc_datetimes.asi8) // minute_values
+
+    # Keep the unit of the column, dates out of the nanoseconds range (e.g. 9999-12-31) are kept by coarser units
+    datetime_values = datetimes.to_numpy()
+    unit = unit or get_datetime_unit(series)
+
+    values = np.datetime_as_string(datetime_values.astype(f'datetime64[{unit}]'), unit=unit)
+    if separator != 'T':
+        values = np.char.replace(values, 'T', separator)
+    values = values.astype(object)
+
+    if offsets is not None:
+        # Columns have only a few distinct offsets, each is formatted once
+        offsets_codes, offsets_uniques = pd.factorize(offsets)
+        offsets_values = np.array([f"{'-' if offset < 0 else '+'}{abs(offset) // 60:02d}:{abs(offset) % 60:02d}" for offset in offsets_uniques], dtype=object)
+        values = values + offsets_values[offsets_codes]
+
+    values[np.isnat(datetime_values)] = ''
+    return values.tolist()
+
+def get_datetime_unit(series):
+    datetimes = pd.DatetimeIndex(series)
+    is_tz_aware = datetimes.tz is not None
+    if is_tz_aware:
+        datetimes = datetimes.tz_localize(None)
+
+    datetime_values = datetimes.to_numpy()
+    column_unit_nanoseconds = dict(DATETIME_UNITS)[np.datetime_data(datetime_values.dtype)[0]]
+    column_unit_values = datetime_values[~np.isnat(datetime_values)].astype('int64')
+
+    # Use the coarsest unit that keeps all values, timezone aware datetimes keep their time so the offset follows it.
+    # The values are counted in the unit of the column, so the units finer than it are not needed
+    units = DATETIME_UNITS[1:] if is_tz_aware else DATETIME_UNITS
+    return next(unit for unit, unit_nanoseconds in units
+                if unit_nanoseconds >= column_unit_nanoseconds and not np.any(column_unit_values % (unit_nanoseconds // column_unit_nanoseconds)))
+
+def pandas_factorize_column(series):
+    if isinstance(series.dtype, pd.CategoricalDtype):
+        return series.cat.codes.to_numpy(), series.cat.categories
+
+    # Equal values of different types (e.g. 1 and True) are factorized together but are formatted differently
+    if series.dtype == object and infer_dtype(series, skipna=True) not in ['string', 'empty']:
+        return None
+
+    # Negative zeros are factorized together with zeros but are formatted differently
+    if is_float_dtype(series.dtype):
+        float_values = series.to_numpy(dtype='float64', na_value=np.nan)
+        if np.any(np.signbit(float_values) & (float_values == 0)):
+            return None
+
+    sample = series.iloc[:FACTORIZE_SAMPLE_ROWS]
+    if sample.nunique(dropna=False) > len(sample) * FACTORIZE_MAX_DISTINCT_RATIO:
+        return None
+
+    try:
+        return pd.factorize(series)
+    except TypeError:
+        # Unhashable values such as lists
+        return None
+
+def pandas_get_data_type(series):
+    # Find the correct DataType according to Pandas dtype
+    dtype_key = str(series.dtype)
+    if dtype_key in data_types_map_pandas:
+        return data_types_map_pandas[dtype_key]
+    elif is_numeric_dtype(series):
+        return DataType.NUMBER.value
+    elif re.search(r"datetime64\[ns, .*\]", dtype_key):
+        return DataType.DATE_TIME_ZONE.value
+    else:
+        return DataType.TEXT.value
+
+def columns_to_rows(columns_values, rows_count):
+    with conversion_stage('columns_to_rows') as stage:
+        stage['rows_count'] = rows_count
+
+        # A DataFrame without columns still has one (empty) row per index entry
+        if not columns_values:
+            return [[] for _ in range(rows_count)]
+
+        return [list(row) for row in zip(*columns_values)]
+
+def polars_get_data_and_schema(df):
+    polars = sys.modules['polars']
+
+    # Cast the values in a single lazy query, so polars can run it in parallel
+    lazy_df = df.lazy()
     columns_schema = []
+    expressions = []
+    python_formatted_columns = []
+
+    for col_name, dtype in lazy_df.collect_schema().items():
+        columns_schema.append({'name': col_name, 'dataType': polars_get_data_type(dtype)})
 
-    for col in df.columns:
-        # Find the correct DataType according to Pandas dtype
-        dtype_key = str(df[col].dtype)
-        if dtype_key in data_types_map_pandas:
-            data_type = data_types_map_pandas[dtype_key]
-        elif is_numeric_dtype(df[col]):
-            data_type = DataType.NUMBER.value
-        elif re.search(r"datetime64\[ns, .*\]", dtype_key):
-            data_type = DataType.DATE_TIME_ZONE.value
+        if isinstance(dtype, polars.Datetime):
+            # Format datetimes like pandas, without trailing zero fractional seconds
+            datetime_format = '%Y-%m-%d %H:%M:%S%.f%:z' if dtype.time_zone else '%Y-%m-%d %H:%M:%S%.f'
+            expressions.append(polars.col(col_name).dt.to_string(datetime_format).fill_null(''))
+        elif dtype.is_numeric() or dtype in [polars.Boolean, polars.String, polars.Categorical, polars.Enum, polars.Date, polars.Time]:
+            expressions.append(polars.col(col_name).cast(polars.String).fill_null(''))
         else:
-            data_type = DataType.TEXT.value
+            # Types without a polars string cast (lists, structs, durations) are converted using their Python string representation
+            expressions.append(polars.col(col_name))
+            python_formatted_columns.append(col_name)
+
+    string_df = lazy_df.select(expressions).collect()
+
+    columns_values = []
+    for col_name in string_df.columns:
+        values = string_df.get_column(col_name).to_list()
+        if col_name in python_formatted_columns:
+            values = ['' if value is None else str(value) for value in values]
+        columns_values.append(values)
+
+    return columns_schema, columns_to_rows(columns_values, string_df.height)
+
+def polars_get_data_type(dtype):
+    polars = sys.modules['polars']
+
+    # Find the correct DataType according to polars dtype
+    if dtype == polars.Boolean:
+        return DataType.LOGICAL.value
+    elif dtype == polars.Int32:
+        return DataType.INT32.value
+    elif dtype.is_numeric():
+        return DataType.NUMBER.value
+    elif isinstance(dtype, polars.Datetime):
+        return DataType.DATE_TIME_ZONE.value if dtype.time_zone else DataType.DATE_TIME.value
+    elif dtype == polars.Date:
+        return DataType.DATE.value
+    elif dtype == polars.Time:
+        return DataType.TIME.value
+    else:
+        return DataType.TEXT.value
+
+def duckdb_get_data_and_schema(relation):
+    columns_schema = [{'name': col_name, 'dataType': duckdb_get_data_type(col_type.id)}
+                      for col_name, col_type in zip(relation.columns, relation.types)]
+
+    # Cast all values as string in DuckDB, NA values should be considered as empty strings
+    quoted_columns = ['"{0}"'.format(col_name.replace('"', '""')) for col_name in relation.columns]
+    string_relation = relation.project(', '.join(f"coalesce(CAST({quoted_col} AS VARCHAR), '') AS {quoted_col}" for quoted_col in quoted_columns))
+
+    columns_values = [values.tolist() for values in string_relation.fetchnumpy().values()]
+    rows_count = len(columns_values[0]) if columns_values else 0
+
+    return columns_schema, columns_to_rows(columns_values, rows_count)
+
+def duckdb_get_data_type(type_id):
+    # Find the correct DataType according to DuckDB type id
+    if type_id == 'boolean':
+        return DataType.LOGICAL.value
+    elif type_id == 'integer':
+        return DataType.INT32.value
+    elif type_id in duckdb_numeric_type_ids:
+        return DataType.NUMBER.value
+    elif type_id == 'timestamp with time zone':
+        return DataType.DATE_TIME_ZONE.value
+    elif type_id.startswith('timestamp'):
+        return DataType.DATE_TIME.value
+    elif type_id == 'date':
+        return DataType.DATE.value
+    elif type_id == 'time':
+        return DataType.TIME.value
+    else:
+        return DataType.TEXT.value
+
+def dask_get_data_and_schema(df):
+    dask = sys.modules['dask']
+
+    # Find the correct DataType according to the dtypes of the DataFrame meta, without computing the data
+    columns_schema = [{'name': col_name, 'dataType': pandas_get_data_type(series)} for col_name, series in df._meta.items()]
+    data_types = [column_schema['dataType'] for column_schema in columns_schema]
+
+    # Convert the partitions in parallel on the Dask workers, only their string rows are gathered
+    partitions_rows = dask.compute(*[dask.delayed(pandas_partition_to_rows)(partition, data_types) for partition in df.to_delayed()])
+
+    return columns_schema, [row for partition_rows in partitions_rows for row in partition_rows]
+
+def pandas_partition_to_rows(partition, data_types):
+    columns_values = [pandas_get_column_values(series, data_type) for (_, series), data_type in zip(partition.items(), data_types)]
+    return columns_to_rows(columns_values, len(partition.index))
+
+def dataframe_to_arrow_table(df):
+    if pa is None:
+        raise Exception("pyarrow is required for the 'arrow' engine, install it using 'pip install pyarrow'")
+
+    if is_arrow_table(df):
+        return df
+    elif is_polars_dataframe(df):
+        return df.lazy().collect().to_arrow()
+    elif is_duckdb_relation(df):
+        # DuckDBPyRelation.arrow returns a RecordBatchReader in recent DuckDB versions
+        return df.to_arrow_table() if hasattr(df, 'to_arrow_table') else df.arrow()
+    elif isinstance(df, pd.DataFrame):
+        arrays = []
+        for _, series in df.items():
+            try:
+                array = pa.array(series, from_pandas=True)
+            except (pa.ArrowInvalid, pa.ArrowTypeError, pa.ArrowNotImplementedError):
+                # Columns with mixed or unsupported value types (e.g. complex numbers) are converted using their string representation
+                array = None
+
+            # Extension types (e.g. pandas periods and intervals) are stored as integers or structs, so they are converted the same way
+            if array is None or isinstance(array.type, pa.ExtensionType):
+                array = pa.array(series.astype('string'), from_pandas=True)
+
+            arrays.append(array)
+
+        return pa.table(arrays, names=[str(col_name) for col_name in df.columns])
+    elif isinstance(df, pyspark.sql.dataframe.DataFrame):
+        # DataFrame.toArrow is available starting from Spark 4.0
+        if hasattr(df, 'toArrow'):
+            return df.toArrow()
+
+        from pyspark.sql.pandas.types import to_arrow_schema
+        return pa.Table.from_batches(df._collect_as_arrow(), schema=to_arrow_schema(df.schema))
+    else:
+        raise Exception("Unsupported DataFrame type")
+
+def arrow_get_data_and_schema(table):
+    columns_schema = []
+    columns_values = []
+
+    for col_name, column in zip(table.column_names, table.columns):
+        data_type, values = arrow_get_column_data_and_type(column)
+        columns_schema.append({'name': col_name, 'dataType': data_type})
+        columns_values.append(values)
+
+    return columns_schema, columns_to_rows(columns_values, table.num_rows)
+
+def arrow_get_column_data_and_type(column):
+    arrow_type = column.type
+    if pa.types.is_dictionary(arrow_type):
+        arrow_type = arrow_type.value_type
+
+    data_type = arrow_get_data_type(arrow_type)
+
+    # Use the coarsest timestamp unit that keeps all values, so trailing sub-second zeros are not formatted
+    if pa.types.is_timestamp(arrow_type):
+        for unit in ['s', 'ms', 'us']:
+            if unit == arrow_type.unit:
+                break
+            try:
+                column = pc.cast(column, pa.timestamp(unit, arrow_type.tz), safe=True)
+                break
+            except pa.ArrowInvalid:
+                # A safe cast fails if any value would be truncated
+                continue
+
+    # Durations are cast to their integer value, they are converted using their Python string representation
+    if pa.types.is_duration(arrow_type):
+        return data_type, ['' if value is None else str(value) for value in column.to_pylist()]
+
+    try:
+        # NA values should be considered as empty strings
+        with conversion_stage('cast') as stage:
+            string_column = pc.fill_null(arrow_cast_to_string(column, arrow_type), '')
+            stage['rows_count'], stage['bytes'] = len(column), column.nbytes
+
+        with conversion_stage('tolist') as stage:
+            values = string_column.to_numpy(zero_copy_only=False).tolist()
+            stage['rows_count'], stage['bytes'] = len(string_column), string_column.nbytes
+    except (pa.ArrowInvalid, pa.ArrowNotImplementedError):
+        # Types without an Arrow string cast are converted using their Python string representation
+        values = ['' if value is None else str(value) for value in column.to_pylist()]
+
+    return data_type, values
+
+def arrow_cast_to_string(column, arrow_type):
+    if pa.types.is_timestamp(arrow_type) and arrow_type.tz is not None:
+        # Format the offset from UTC as +HH:MM like the other engines, instead of +HHMM or Z
+        return pc.replace_substring_regex(pc.strftime(column, '%Y-%m-%d %H:%M:%S%z'), r'([+-]\d{2})(\d{2})$', r'\1:\2')
+
+    return pc.cast(column, pa.string())
+
+def arrow_get_data_type(arrow_type):
+    # Find the correct DataType according to Arrow type
+    if pa.types.is_boolean(arrow_type):
+        return DataType.LOGICAL.value
+    elif pa.types.is_int32(arrow_type):
+        return DataType.INT32.value
+    elif pa.types.is_integer(arrow_type) or pa.types.is_floating(arrow_type) or pa.types.is_decimal(arrow_type):
+        return DataType.NUMBER.value
+    elif pa.types.is_timestamp(arrow_type):
+        return DataType.DATE_TIME_ZONE.value if arrow_type.tz else DataType.DATE_TIME.value
+    elif pa.types.is_date(arrow_type):
+        return DataType.DATE.value
+    elif pa.types.is_time(arrow_type):
+        return DataType.TIME.value
+    else:
+        return DataType.TEXT.value
+
+def aggregate_dataframe(df, aggregation):
+    numeric_data_types = [DataType.NUMBER.value, DataType.INT32.value]
+
+    if isinstance(df, pd.DataFrame):
+        aggregated_columns = [col_name for col_name, series in df.items() if pandas_get_data_type(series) in numeric_data_types]
+    elif isinstance(df, pyspark.sql.dataframe.DataFrame):
+        aggregated_columns = [col_name for col_name, dtype_key in df.dtypes if pyspark_get_data_type(df, col_name, dtype_key) in numeric_data_types]
+    else:
+        raise Exception("Unsupported DataFrame type")
+
+    group_by_columns = [col_name for col_name in df.columns if col_name not in aggregated_columns]
+    metadata = {
+        'function': aggregation,
+        'group_by_columns': group_by_columns,
+        'aggregated_columns': aggregated_columns
+    }
+
+    if isinstance(df, pd.DataFrame):
+        if not aggregated_columns:
+            return df.drop_duplicates(ignore_index=True), metadata
+        elif not group_by_columns:
+            # Aggregate each column separately, so integer columns keep their dtype
+            return pd.concat([pandas_aggregate_column(series, aggregation) for _, series in df.items()], axis=1), metadata
+
+        # Keep NA values as their own group, as they are sent as empty strings
+        grouped_df = df.groupby(group_by_columns, dropna=False, sort=False, observed=True)[aggregated_columns]
+        # Sums of only NA values are NA as in Spark, instead of 0
+        aggregated_df = grouped_df.sum(min_count=1) if aggregation == 'sum' else grouped_df.count()
+        return aggregated_df.reset_index()[list(df.columns)], metadata
+    else:
+        if not aggregated_columns:
+            return df.distinct(), metadata
+
+        aggregate_function = spark_sum if aggregation == 'sum' else count
+        aggregated_df = df.groupBy(*group_by_columns).agg(*[aggregate_function(col(col_name)).alias(col_name) for col_name in aggregated_columns])
+        return aggregated_df.select(*df.columns), metadata
+
+def pandas_aggregate_column(series, aggregation):
+    if aggregation == 'count':
+        return pd.Series([series.count()], name=series.name)
+
+    value = series.sum(min_count=1)
+    if pd.isna(value):
+        return pd.Series([np.nan], name=series.name)
+
+    return pd.Series([value], name=series.name).astype(series.dtype)
+
+def project_dataframe(df, columns=None, where=None):
+    if not isinstance(df, (pd.DataFrame, pyspark.sql.dataframe.DataFrame)):
+        raise Exception("Parameters columns and where are supported only for pandas and Spark DataFrames")
+
+    missing_columns = [col_name for col_name in (columns or []) if col_name not in df.columns]
+    if missing_columns:
+        raise Exception(f"Columns {missing_columns} are not found in the DataFrame")
+
+    # Filter before selecting the columns, so the filter can use columns which are not selected
+    if isinstance(df, pd.DataFrame):
+        if where is not None:
+            df = df.query(where) if isinstance(where, str) else df[where]
+
+        return df if columns is None else df[list(columns)]
+    else:
+        # The filter and the projection are pushed down to the source, as they precede the casts
+        if where is not None:
+            df = df.where(where)
+
+        return df if columns is None else df.select(*columns)
+
+def shape_dataframe(df, high_cardinality_action=None, max_text_length=None):
+    estimation = estimate_dataset_config_size(df)
+
+    if isinstance(df, pd.DataFrame):
+        text_columns = [col_name for col_name, series in df.items() if pandas_get_data_type(series) == DataType.TEXT.value]
+    elif isinstance(df, pyspark.sql.dataframe.DataFrame):
+        text_columns = [col_name for col_name, dtype_key in df.dtypes if dtype_key == 'string']
+    else:
+        raise Exception("Unsupported DataFrame type")
+
+    high_cardinality_columns = []
+    if high_cardinality_action is not None and estimation['rows_count'] >= HIGH_CARDINALITY_MIN_ROWS:
+        high_cardinality_columns = get_high_cardinality_columns(df, text_columns)
+
+    truncated_columns = []
+    if max_text_length is not None:
+        truncated_columns = get_long_text_columns(df, [col_name for col_name in text_columns if col_name not in high_cardinality_columns], max_text_length)
+
+    if isinstance(df, pd.DataFrame):
+        if high_cardinality_action == 'drop':
+            df = df.drop(columns=high_cardinality_columns)
+
+        # Columns are set by label rather than by keyword, so non string labels (e.g. 0) are supported
+        hashed_columns = high_cardinality_columns if high_cardinality_action == 'hash' else []
+        if hashed_columns or truncated_columns:
+            df = df.copy()
+        for col_name in hashed_columns:
+            df[col_name] = pandas_hash_values(df[col_name])
+        for col_name in truncated_columns:
+            df[col_name] = df[col_name].str.slice(stop=max_text_length)
+    else:
+        if high_cardinality_action == 'drop':
+            df = df.drop(*high_cardinality_columns)
+
+        # Spark hashes null values as well, they are kept as nulls
+        hashed_columns = high_cardinality_columns if high_cardinality_action == 'hash' else []
+        df = df.select(*[
+            when(col(col_name).isNotNull(), lower(lpad(spark_hex(xxhash64(col(col_name))), 16, '0'))).alias(col_name) if col_name in hashed_columns
+            else substring(col(col_name), 1, max_text_length).alias(col_name) if col_name in truncated_columns
+            else col(col_name)
+            for col_name in df.columns
+        ])
+
+    metadata = {
+        'dropped_columns': high_cardinality_columns if high_cardinality_action == 'drop' else [],
+        'hashed_columns': high_cardinality_columns if high_cardinality_action == 'hash' else [],
+        'truncated_columns': truncated_columns,
+        'estimated_bytes_before': estimation['estimated_bytes'],
+        'estimated_bytes_after': round(estimation['rows_count'] * (2 + sum(estimate_columns_bytes(df).values()))) if estimation['rows_count'] else 0
+    }
+
+    return df, metadata
+
+def get_high_cardinality_columns(df, text_columns):
+    if isinstance(df, pd.DataFrame):
+        distinct_ratios = {col_name: df[col_name].nunique() / max(df[col_name].count(), 1) for col_name in text_columns}
+    else:
+        if not text_columns:
+            return []
+
+        # A single pass computes the approximate distinct count of all the text columns, within 1% so identifiers are not missed
+        counts = df.agg(*[count(col(col_name)) for col_name in text_columns],
+                        *[approx_count_distinct(col(col_name), rsd=0.01) for col_name in text_columns]).first()
+        distinct_ratios = {col_name: counts[len(text_columns) + i] / max(counts[i], 1) for i, col_name in enumerate(text_columns)}
+
+    return [col_name for col_name, distinct_ratio in distinct_ratios.items() if distinct_ratio >= HIGH_CARDINALITY_RATIO]
+
+def get_long_text_columns(df, text_columns, max_text_length):
+    if isinstance(df, pd.DataFrame):
+        # Only columns of strings are truncated, other values keep their formatting
+        return [col_name for col_name in text_columns
+                if (df[col_name].dtype == 'string' or infer_dtype(df[col_name], skipna=True) == 'string') and df[col_name].str.len().max() > max_text_length]
+
+    if not text_columns:
+        return []
+
+    max_lengths = df.agg(*[spark_max(length(col(col_name))) for col_name in text_columns]).first()
+    return [col_name for col_name, max_length in zip(text_columns, max_lengths) if max_length is not None and max_length > max_text_length]
+
+def pandas_hash_values(series):
+    hashes = pd.util.hash_pandas_object(series, index=False).to_numpy()
+    values = pd.Series([f'{value:016x}' for value in hashes.tolist()], index=series.index, dtype=object)
+    return values.where(series.notna())
+
+def sample_dataframe(df, max_rows=None, max_bytes=None, seed=0, stratify_by=None):
+    rows_count = get_dataframe_rows_count(df)
+    row_bytes = estimate_row_bytes(df)
+
+    target_rows_count = rows_count if max_rows is None else min(rows_count, max_rows)
+    if max_bytes is not None and row_bytes:
+        target_rows_count = min(target_rows_count, int(max_bytes // row_bytes))
+
+    metadata = {
+        'rows_count': rows_count,
+        'estimated_bytes': round(rows_count * row_bytes),
+        'fraction': 1.0,
+        'seed': seed,
+        'stratify_by': stratify_by
+    }
+
+    if target_rows_count >= rows_count:
+        return df, metadata
+
+    fraction = target_rows_count / rows_count
+    metadata['fraction'] = fraction
+
+    if isinstance(df, pd.DataFrame):
+        return pandas_sample(df, target_rows_count, fraction, seed, stratify_by), metadata
+    else:
+        return pyspark_sample(df, target_rows_count, fraction, seed, stratify_by), metadata
+
+def pandas_sample(df, target_rows_count, fraction, seed, stratify_by):
+    rng = np.random.default_rng(seed)
+
+    if stratify_by is None:
+        positions = rng.choice(len(df.index), target_rows_count, replace=False)
+    else:
+        # Sample each value proportionally, the sample has exactly the target rows count
+        groups_positions = list(df.groupby(stratify_by, dropna=False, sort=False, observed=True).indices.values())
+        groups_rows_counts = get_strata_rows_counts(np.array([len(group_positions) for group_positions in groups_positions]), target_rows_count, rng)
+        positions = np.concatenate([rng.choice(group_positions, group_rows_count, replace=False)
+                                    for group_positions, group_rows_count in zip(groups_positions, groups_rows_counts)])
+
+    # Keep the original order of the rows
+    return df.take(np.sort(positions))
+
+def get_strata_rows_counts(strata_sizes, target_rows_count, rng):
+    # Split the target rows count by the largest remainder method,
+    # keeping at least one row of every value when the target rows count allows it
+    quotas = strata_sizes * target_rows_count / strata_sizes.sum()
+    min_rows_count = 1 if len(strata_sizes) <= target_rows_count else 0
+    rows_counts = np.maximum(np.floor(quotas).astype(int), min_rows_count)
+
+    # The rows kept for the smallest values are taken from the values furthest above their quota
+    for _ in range(rows_counts.sum() - target_rows_count):
+        rows_counts[np.argmax(np.where(rows_counts > min_rows_count, rows_counts - quotas, -np.inf))] -= 1
+
+    # The remaining rows go to the values with the largest remainders, ties are broken randomly
+    remaining_rows_count = target_rows_count - rows_counts.sum()
+    if remaining_rows_count > 0:
+        order = rng.permutation(len(strata_sizes))
+        rows_counts[order[np.argsort((rows_counts - quotas)[order], kind='stable')[:remaining_rows_count]]] += 1
+
+    return rows_counts
+
+def pyspark_sample(df, target_rows_count, fraction, seed, stratify_by):
+    if stratify_by is None:
+        sampled_df = df.sample(withReplacement=False, fraction=fraction, seed=seed)
+    else:
+        # Sample by the string representation of the values, so NA values are sampled as well
+        stratify_col = coalesce(col(stratify_by).cast("string"), lit(''))
+        keys = [row[0] for row in df.select(stratify_col).distinct().collect()]
+        sampled_df = df.sampleBy(stratify_col, {key: fraction for key in keys}, seed=seed)
+
+    # Spark samples each row independently, limit the sample to the target rows count
+    return sampled_df.limit(target_rows_count)
+
+def get_dataframe_rows_count(df):
+    if isinstance(df, pd.DataFrame):
+        return len(df.index)
+    elif isinstance(df, pyspark.sql.dataframe.DataFrame):
+        return df.count()
+    else:
+        raise Exception("Unsupported DataFrame type")
 
-        # Logical values should be with lower case: true / false
-        if data_type == DataType.LOGICAL.value:
-            df[col] = df[col].astype('string').str.lower()
+def estimate_dataset_config_size(df, sample_rows=ESTIMATE_SAMPLE_ROWS):
+    """ Utility method to estimate the size of the dataset create configuration of a pandas or Spark DataFrame, without converting all of its rows
 
-        columns_schema.append({'name': col, 'dataType': data_type})
+    Args:
+        df (object): Required.
+            Pandas or Spark DataFrame instance
+        sample_rows (int): Optional.
+            Number of rows converted to estimate the size of a row, evenly spaced for pandas DataFrames and the first rows for Spark DataFrames
 
-    return columns_schema, df.astype('string').values.tolist()
+    Returns:
+        dict: estimation with the keys:
+            - 'rows_count' - Number of rows of the DataFrame
+            - 'row_bytes' - Estimated average JSON size in bytes of a row
+            - 'estimated_bytes' - Estimated JSON size in bytes of all the rows
+            - 'columns_bytes' - Dict of the estimated average JSON size in bytes of each column's values in a row
+    """
+    rows_count = get_dataframe_rows_count(df)
+    columns_bytes = estimate_columns_bytes(df, sample_rows)
+
+    # A row is a JSON list of its values, each followed by a separator
+    row_bytes = 2 + sum(columns_bytes.values()) if rows_count else 0
 
-def is_dataset_create_config_valid(dataset_create_config):
+    return {
+        'rows_count': rows_count,
+        'row_bytes': row_bytes,
+        'estimated_bytes': round(rows_count * row_bytes),
+        'columns_bytes': columns_bytes
+    }
+
+def estimate_row_bytes(df, sample_rows=ESTIMATE_SAMPLE_ROWS):
+    return estimate_dataset_config_size(df, sample_rows)['row_bytes']
+
+def estimate_columns_bytes(df, sample_rows=ESTIMATE_SAMPLE_ROWS):
+    # Estimate the JSON size of each column's values by converting a subset of the rows of the DataFrame
+    if isinstance(df, pd.DataFrame):
+        # Evenly spaced rows represent sorted DataFrames better than the first rows
+        positions = np.unique(np.linspace(0, len(df.index) - 1, num=min(sample_rows, len(df.index)), dtype=int))
+        columns_schema, rows = pandas_get_data_and_schema(df.take(positions))
+    elif isinstance(df, pyspark.sql.dataframe.DataFrame):
+        columns_schema, rows = pyspark_get_data_and_schema(df.limit(sample_rows))
+    else:
+        raise Exception("Unsupported DataFrame type")
+
+    if not rows:
+        return {column_schema['name']: 0 for column_schema in columns_schema}
+
+    # The brackets and separators of the JSON list of a column's values have the size of a separator per value, as in the rows
+    columns_values = zip(*rows)
+    return {column_schema['name']: len(json.dumps(column_values, ensure_ascii=False).encode('utf-8')) / len(rows)
+            for column_schema, column_values in zip(columns_schema, columns_values)}
+
+def estimate_rows_bytes(rows, sample_rows=ESTIMATE_SAMPLE_ROWS):
+    # Estimate the JSON size of converted rows from evenly spaced rows
+    if not rows:
+        return 0
+    elif isinstance(rows, LazyRows):
+        return rows.estimate_bytes(sample_rows)
+
+    positions = np.unique(np.linspace(0, len(rows) - 1, num=min(sample_rows, len(rows)), dtype=int))
+    sampled_rows = [rows[position] for position in positions]
+
+    return round(len(json.dumps(sampled_rows, ensure_ascii=False).encode('utf-8')) / len(sampled_rows) * len(rows))
+
+def estimate_dataset_config_bytes(dataset_create_config, sample_rows=ESTIMATE_SAMPLE_ROWS):
+    # Estimate the JSON size of the rows of all the tables of a dataset create configuration
+    return sum(estimate_rows_bytes(table['rows'], sample_rows) for table in dataset_create_config['data'])
+
+def get_dataframe_fingerprint(df):
+    hasher = hashlib.blake2b(digest_size=16)
+    hasher.update(repr(type(df)).encode())
+
+    try:
+        if isinstance(df, pd.DataFrame):
+            # The index is not converted, only the column names, types and values identify the content
+            hasher.update(repr([(col_name, str(dtype)) for col_name, dtype in df.dtypes.items()]).encode())
+            hasher.update(pd.util.hash_pandas_object(df, index=False).values.tobytes())
+        elif isinstance(df, pyspark.sql.dataframe.DataFrame):
+            # The canonicalized logical plan identifies the query, the input files identify the version of file based sources
+            hasher.update(df.schema.json().encode())
+            hasher.update(str(df.semanticHash()).encode())
+            hasher.update(repr(sorted(df.inputFiles())).encode())
+        else:
+            return None
+    except TypeError:
+        # DataFrames with unhashable values are not cached
+        return None
+
+    return hasher.hexdigest()
+
+def is_dataset_create_config_valid(dataset_create_config, strict=False):
     """ Validate dataset_create_config
 
     Args:
         dataset_create_config (dict): Required.
             A dict representing the data used to create the report, formatted as IDatasetCreateConfiguration
             (See: https://learn.microsoft.com/en-us/javascript/api/overview/powerbi/embed-quick-report#step-11---create-a-dataset-without-a-data-source)
+        strict (bool): Optional.
+            Validate the columns and rows of the tables as well: column data types, row widths and string values
 
     Returns:
         bool: True if dataset_create_config is valid, False otherwise
@@ -137,7 +1796,7 @@ def is_dataset_create_config_valid(dataset_create_config):
     if dataset_create_config is None or type(dataset_create_config) is not dict:
         return False
 
-    if len(dataset_create_config.keys()) != 3:
+    if len(dataset_create_config.keys() - {METADATA_KEY}) != 3:
         return False
 
     # Validate locale
@@ -155,17 +1814,65 @@ def is_dataset_create_config_valid(dataset_create_config):
     if not is_dataset_create_config_items_valid(data, ['name', 'rows']):
         return False
 
+    # Validate each table has a schema and data
+    table_names = [table['name'] for table in table_schema_list]
+    if len(set(table_names)) != len(table_names) or set(table_names) != set(table['name'] for table in data):
+        return False
+
+    if strict and get_dataset_create_config_rows_error(dataset_create_config) is not None:
+        return False
+
     return True
 
+def get_dataset_create_config_rows_error(dataset_create_config):
+    # Describe the first invalid column or row of the tables of a dataset create configuration, which is otherwise valid
+    data_types = [data_type.value for data_type in DataType]
+    tables_columns = {table['name']: table['columns'] for table in dataset_create_config['tableSchemaList']}
+
+    for table in dataset_create_config['data']:
+        table_name = table['name']
+        columns = tables_columns[table_name]
+        rows = table['rows']
+
+        if type(columns) is not list or not all(type(column) is dict and type(column.get('name')) is str and column.get('dataType') in data_types
+                                                for column in columns):
+            return f"Table '{table_name}' columns should have a name and one of the data types: {data_types}"
+        elif len(set(column['name'] for column in columns)) != len(columns):
+            return f"Table '{table_name}' has duplicate column names"
+        elif isinstance(rows, LazyRows):
+            # Lazy rows are converted from the DataFrame of the columns when they are sent, they are not converted to be validated
+            continue
+        elif type(rows) is not list:
+            return f"Table '{table_name}' rows should be a list"
+
+        # The rows and their values are checked by C level iterations, the rows widths are compared as a NumPy array
+        if set(map(type, rows)) - {list}:
+            return f"Table '{table_name}' rows should be lists"
+
+        rows_widths = np.fromiter(map(len, rows), dtype=np.int64, count=len(rows))
+        invalid_rows = np.flatnonzero(rows_widths != len(columns))
+        if invalid_rows.size:
+            return f"Row {invalid_rows[0]} of table '{table_name}' has {rows_widths[invalid_rows[0]]} values instead of {len(columns)}"
+
+        if set(map(type, chain.from_iterable(rows))) - {str}:
+            invalid_row = next(i for i, row in enumerate(rows) if any(type(value) is not str for value in row))
+            return f"Row {invalid_row} of table '{table_name}' has values which are not strings"
+
+    return None
+
 
 def is_dataset_create_config_items_valid(lst, expected_item_fields):
-    if not lst or type(lst) != list or len(lst) != 1:
+    if not lst or type(lst) != list:
         return False
 
-    for field in expected_item_fields:
-        if not lst[0].get(field):
+    for item in lst:
+        if type(item) != dict:
             return False
 
+        for field in expected_item_fields:
+            if not item.get(field):
+                return False
+
     return True
 
 
@@ -101,7 +101,18 @@ setup_args = dict(
             'pytest-cov',
             'nbval',
             'requests_mock',
-            'mock'
+            'mock',
+            'pyarrow',
+            'polars',
+            'duckdb',
+            'dask[dataframe]'
+        ],
+        'arrow': [
+            'pyarrow',
+        ],
+        'benchmark': [
+            'asv',
+            'pyarrow',
         ],
         'demo': [
             'pandas',
@@ -1,7 +1,7 @@
 // Copyright (c) Microsoft Corporation.
 // Licensed under the MIT license.
 
-import { DOMWidgetModel, DOMWidgetView } from '@jupyter-widgets/base';
+import { DOMWidgetModel, DOMWidgetView, ISerializers } from '@jupyter-widgets/base';
 
 import { models } from 'powerbi-client';
 
@@ -13,6 +13,90 @@ const quickCreateEmbedUrl = 'https://app.powerbi.com/quickCreate';
 const reportCreationMode = models.ReportCreationMode.QuickExplore;
 const quickCreateTokenType = models.TokenType.Aad;
 
+const dictionaryCodesArrays: { [codesType: string]: Uint8ArrayConstructor | Uint16ArrayConstructor | Uint32ArrayConstructor } = {
+  uint8: Uint8Array,
+  uint16: Uint16Array,
+  uint32: Uint32Array,
+};
+
+interface DictionaryColumnValues {
+  dictionary: string[];
+  codesType: string;
+  codes: DataView | number[];
+}
+
+/**
+ * Decode the values of a dictionary encoded column, whose codes are a little endian binary buffer or a list
+ */
+function decodeColumnValues(columnValues: string[] | DictionaryColumnValues): string[] {
+  if (Array.isArray(columnValues)) {
+    return columnValues;
+  }
+
+  const { dictionary, codesType, codes } = columnValues;
+  if (Array.isArray(codes)) {
+    return codes.map((code) => dictionary[code]);
+  }
+
+  // The buffer is copied so the typed array is aligned with its type
+  const codesArray = new dictionaryCodesArrays[codesType](codes.buffer.slice(codes.byteOffset, codes.byteOffset + codes.byteLength));
+  return Array.from(codesArray, (code) => dictionary[code]);
+}
+
+/**
+ * Append the rows of a list of the values of each column
+ */
+function appendColumnsValuesRows(encodedColumnsValues: (string[] | DictionaryColumnValues)[], rows: string[][]): void {
+  const columnsValues = encodedColumnsValues.map(decodeColumnValues);
+  const rowsCount = columnsValues.length ? columnsValues[0].length : 0;
+
+  for (let rowIndex = 0; rowIndex < rowsCount; rowIndex++) {
+    rows.push(columnsValues.map((columnValues) => columnValues[rowIndex]));
+  }
+}
+
+/**
+ * Expand the tables data sent in the wire format of the widget into rows (see embed_config_to_json in quick_visualize.py):
+ * lists of column values, possibly dictionary encoded, and chunks of JSON lists of rows or of column values in binary buffers
+ */
+function deserializeEmbedConfig(embedConfig: any): any {
+  const tables = embedConfig?.datasetCreateConfig?.data;
+  if (!tables) {
+    return embedConfig;
+  }
+
+  const decoder = new TextDecoder();
+
+  for (const table of tables) {
+    if (table.rows) {
+      continue;
+    }
+
+    const rows: string[][] = [];
+
+    if (table.columnsValues) {
+      appendColumnsValuesRows(table.columnsValues, rows);
+    }
+
+    for (const rowsChunk of (table.rowsChunks ?? []) as DataView[]) {
+      for (const row of JSON.parse(decoder.decode(rowsChunk))) {
+        rows.push(row);
+      }
+    }
+
+    for (const columnsValuesChunk of (table.columnsValuesChunks ?? []) as DataView[]) {
+      appendColumnsValuesRows(JSON.parse(decoder.decode(columnsValuesChunk)), rows);
+    }
+
+    table.rows = rows;
+    delete table.columnsValues;
+    delete table.rowsChunks;
+    delete table.columnsValuesChunks;
+  }
+
+  return embedConfig;
+}
+
 export class QuickVisualizeModel extends DOMWidgetModel {
   defaults(): any {
     return {
@@ -37,6 +121,11 @@ export class QuickVisualizeModel extends DOMWidgetModel {
     };
   }
 
+  static serializers: ISerializers = {
+    ...DOMWidgetModel.serializers,
+    _embed_config: { deserialize: deserializeEmbedConfig },
+  };
+
   static model_name = 'QuickVisualizeModel';
   static model_module = MODULE_NAME;
   static model_module_version = MODULE_VERSION;